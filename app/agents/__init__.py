@@ -1,14 +1,36 @@
 """
 Agentic prediction system for autonomous stock prediction with enhanced accuracy.
+
+Agents are imported lazily on first attribute access (PEP 562), so importing a
+single submodule such as ``app.agents.chat_agent`` does not pull in pandas,
+yfinance and the rest of the prediction stack.
 """
-from app.agents.base_agent import BaseAgent
-from app.agents.base_evaluative_agent import BaseEvaluativeAgent
-from app.agents.ensemble_agent import EnsembleAgent
-from app.agents.data_enrichment_agent import DataEnrichmentAgent
-from app.agents.adaptive_learning_agent import AdaptiveLearningAgent
-from app.agents.prediction_evaluator_agent import PredictionEvaluatorAgent
-from app.agents.outcome_evaluator_agent import OutcomeEvaluatorAgent
-from app.agents.prediction_coordinator import PredictionCoordinator
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.agents.base_agent import BaseAgent
+    from app.agents.base_evaluative_agent import BaseEvaluativeAgent
+    from app.agents.ensemble_agent import EnsembleAgent
+    from app.agents.data_enrichment_agent import DataEnrichmentAgent
+    from app.agents.adaptive_learning_agent import AdaptiveLearningAgent, AdaptivePrediction, Regime
+    from app.agents.prediction_evaluator_agent import PredictionEvaluatorAgent
+    from app.agents.outcome_evaluator_agent import OutcomeEvaluatorAgent
+    from app.agents.prediction_coordinator import PerformanceMetrics, PredictionCoordinator
+
+_LAZY_IMPORTS = {
+    'BaseAgent': 'app.agents.base_agent',
+    'BaseEvaluativeAgent': 'app.agents.base_evaluative_agent',
+    'EnsembleAgent': 'app.agents.ensemble_agent',
+    'DataEnrichmentAgent': 'app.agents.data_enrichment_agent',
+    'AdaptiveLearningAgent': 'app.agents.adaptive_learning_agent',
+    'AdaptivePrediction': 'app.agents.adaptive_learning_agent',
+    'Regime': 'app.agents.adaptive_learning_agent',
+    'PredictionEvaluatorAgent': 'app.agents.prediction_evaluator_agent',
+    'OutcomeEvaluatorAgent': 'app.agents.outcome_evaluator_agent',
+    'PerformanceMetrics': 'app.agents.prediction_coordinator',
+    'PredictionCoordinator': 'app.agents.prediction_coordinator',
+}
 
 __all__ = [
     'BaseAgent',
@@ -16,7 +38,23 @@ __all__ = [
     'EnsembleAgent',
     'DataEnrichmentAgent',
     'AdaptiveLearningAgent',
+    'AdaptivePrediction',
+    'Regime',
     'PredictionEvaluatorAgent',
     'OutcomeEvaluatorAgent',
+    'PerformanceMetrics',
     'PredictionCoordinator'
 ]
+
+
+def __getattr__(name: str):
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value  # cache so later lookups bypass __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,29 @@
+"""
+Optional Numba JIT support for small numeric agent kernels.
+
+Falls back to a no-op decorator when numba is not installed, so kernels
+decorated with ``@njit`` still run as plain Python.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit  # type: ignore
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+    logger.debug("numba not installed – agent kernels will run without JIT")
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for ``numba.njit`` supporting both ``@njit`` and ``@njit(...)``."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+__all__ = ['njit', '_NUMBA_AVAILABLE']
@@ -2,13 +2,212 @@
 Adaptive learning agent that continuously improves predictions based on feedback.
 """
 import numpy as np
+from dataclasses import asdict, dataclass
 from typing import Dict, Any, List, Tuple, Optional
 import logging
 from datetime import datetime, timedelta
+from enum import IntEnum
 from pathlib import Path
 import json
+import math
+import os
+from collections import OrderedDict, deque
+from types import MappingProxyType
 
-from app.agents.base_agent import BaseAgent
+try:
+    import orjson  # type: ignore
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+from app.agents._njit import njit, _NUMBA_AVAILABLE
+from app.agents.base_agent import BaseAgent, _relative_error
+
+
+class Regime(IntEnum):
+    """Market regime codes; values index into ``_REGIME_NAMES`` and the strategy table"""
+    BULL = 0
+    BEAR = 1
+    SIDEWAYS = 2
+    VOLATILE = 3
+
+
+_REGIME_NAMES = ('bull', 'bear', 'sideways', 'volatile')
+_REGIME_CODES = {name: Regime(code) for code, name in enumerate(_REGIME_NAMES)}
+_REGIME_WINDOW = 50
+
+# Maximum number of symbols whose incremental regime state is retained
+_REGIME_STATE_CACHE_SIZE = 512
+
+# Version of the persisted learning state layout (files without one are version 1)
+_STATE_SCHEMA_VERSION = 2
+
+# Per-model error ring buffer size and the window used for weight updates
+_ERROR_HISTORY = 100
+_RECENT_ERRORS = 20
+
+
+@njit(cache=True)
+def _regime_kernel(close):
+    """
+    Classify the market regime from the last ``_REGIME_WINDOW`` closes.
+
+    Single pass over the window: both SMAs plus a Welford sample variance of
+    the simple returns. Returns an index into ``_REGIME_NAMES``.
+    """
+    n = close.shape[0]
+
+    sma_20 = 0.0
+    for i in range(n - 20, n):
+        sma_20 += close[i]
+    sma_20 /= 20.0
+
+    sma_50 = 0.0
+    for i in range(n):
+        sma_50 += close[i]
+    sma_50 /= n
+
+    mean = 0.0
+    m2 = 0.0
+    k = 0
+    for i in range(1, n):
+        r = (close[i] - close[i - 1]) / close[i - 1]
+        k += 1
+        delta = r - mean
+        mean += delta / k
+        m2 += delta * (r - mean)
+    volatility = (m2 / (k - 1)) ** 0.5
+
+    current_price = close[n - 1]
+    if volatility > 0.03:
+        return 3
+    if current_price > sma_20 and sma_20 > sma_50:
+        return 0
+    if current_price < sma_20 and sma_20 < sma_50:
+        return 1
+    return 2
+
+
+def _regime_kernel_numpy(close):
+    """Vectorised equivalent of ``_regime_kernel`` used when numba is unavailable."""
+    sma_20 = close[-20:].mean()
+    sma_50 = close.mean()
+    current_price = close[-1]
+    volatility = (np.diff(close) / close[:-1]).std(ddof=1)
+
+    if volatility > 0.03:
+        return 3
+    if current_price > sma_20 > sma_50:
+        return 0
+    if current_price < sma_20 < sma_50:
+        return 1
+    return 2
+
+
+_regime_code = _regime_kernel if _NUMBA_AVAILABLE else _regime_kernel_numpy
+
+
+def _dump_state(state: Dict[str, Any], pretty: bool = False) -> bytes:
+    """Serialise learning state to JSON bytes, using orjson when installed"""
+    if _ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(state, option=option)
+    if pretty:
+        return json.dumps(state, indent=2).encode()
+    return json.dumps(state, separators=(',', ':')).encode()
+
+
+def _classify_regime(current_price: float, sma_20: float, sma_50: float, volatility: float) -> int:
+    """Map regime indicators to a regime code (same thresholds as the kernels)"""
+    if volatility > 0.03:
+        return 3
+    if current_price > sma_20 > sma_50:
+        return 0
+    if current_price < sma_20 < sma_50:
+        return 1
+    return 2
+
+
+class _RegimeWindow:
+    """
+    Incremental regime state for one symbol.
+
+    Holds the last ``_REGIME_WINDOW`` closes in a ring buffer together with the
+    running sums needed for both SMAs and the return variance, so a single new
+    bar is absorbed in O(1) instead of re-reducing the whole window.
+    """
+    __slots__ = ('buf', 'head', 'sum_20', 'sum_50', 'ret_sum', 'ret_sumsq',
+                 'last_label', 'last_close', 'code', 'steps')
+
+    def __init__(self, window: np.ndarray, last_label: Any, code: int):
+        returns = np.diff(window) / window[:-1]
+        self.buf = window.copy()
+        self.head = 0  # index of the oldest close
+        self.sum_20 = float(window[-20:].sum())
+        self.sum_50 = float(window.sum())
+        self.ret_sum = float(returns.sum())
+        self.ret_sumsq = float((returns * returns).sum())
+        self.last_label = last_label
+        self.last_close = float(window[-1])
+        self.code = code
+        self.steps = 0
+
+    def advance(self, close: float, label: Any) -> int:
+        """Slide the window forward by one bar and return the new regime code"""
+        buf = self.buf
+        head = self.head
+        oldest = buf[head]
+        second = buf[(head + 1) % _REGIME_WINDOW]
+        leaving_20 = buf[(head + _REGIME_WINDOW - 20) % _REGIME_WINDOW]
+        last = self.last_close
+
+        dropped_return = (second - oldest) / oldest
+        added_return = (close - last) / last
+
+        self.sum_50 += close - oldest
+        self.sum_20 += close - leaving_20
+        self.ret_sum += added_return - dropped_return
+        self.ret_sumsq += added_return * added_return - dropped_return * dropped_return
+
+        buf[head] = close
+        self.head = (head + 1) % _REGIME_WINDOW
+        self.last_label = label
+        self.last_close = close
+        self.steps += 1
+
+        n_returns = _REGIME_WINDOW - 1
+        variance = (self.ret_sumsq - self.ret_sum * self.ret_sum / n_returns) / (n_returns - 1)
+        volatility = math.sqrt(variance) if variance > 0.0 else 0.0
+        self.code = _classify_regime(close, self.sum_20 / 20.0, self.sum_50 / _REGIME_WINDOW, volatility)
+        return self.code
+
+
+@dataclass(slots=True)
+class AdaptivePrediction:
+    """
+    Result of ``AdaptiveLearningAgent.predict``.
+
+    Supports ``result['key']`` and ``result.get('key')`` so callers written
+    against the previous dict result keep working.
+    """
+    market_regime: str
+    recommended_strategy: Dict[str, Any]
+    adaptive_weights: Dict[str, float]
+    confidence_adjustment: float
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
 
 
 class AdaptiveLearningAgent(BaseAgent):
@@ -31,27 +230,35 @@ class AdaptiveLearningAgent(BaseAgent):
         
         # Model performance tracking
         self.model_performance = {
-            'transformer': {'errors': [], 'weights': 1.0},
-            'lstm': {'errors': [], 'weights': 1.0}
+            'transformer': self._new_performance_record(),
+            'lstm': self._new_performance_record()
         }
         
         # Market regime detection
-        self.market_regimes = ['bull', 'bear', 'sideways', 'volatile']
-        self.regime_strategies = {
-            'bull': {'model_preference': 'transformer', 'confidence_boost': 0.1},
-            'bear': {'model_preference': 'lstm', 'confidence_boost': 0.05},
-            'sideways': {'model_preference': 'ensemble', 'confidence_boost': 0.0},
-            'volatile': {'model_preference': 'ensemble', 'confidence_boost': -0.1}
-        }
+        self.market_regimes = list(_REGIME_NAMES)
+        # Strategies indexed by Regime code; regime_strategies exposes them by name
+        self._strategies = [
+            {'model_preference': 'transformer', 'confidence_boost': 0.1},
+            {'model_preference': 'lstm', 'confidence_boost': 0.05},
+            {'model_preference': 'ensemble', 'confidence_boost': 0.0},
+            {'model_preference': 'ensemble', 'confidence_boost': -0.1}
+        ]
         
         # Prediction history for learning
-        self.prediction_history = []
         self.max_history = 1000
+        self.prediction_history = deque(maxlen=self.max_history)
         
         # Adaptive weights for ensemble
         self.adaptive_weights = {'transformer': 0.5, 'lstm': 0.5}
+        
+        # Per-symbol incremental regime state (LRU ordered)
+        self._sma_state: "OrderedDict[str, _RegimeWindow]" = OrderedDict()
+        
+        # Normalized weights only change when a model weight is updated
+        self._cached_adaptive_weights = None
+        self._weights_dirty = True
     
-    def predict(self, symbol: str, data: Any = None) -> Dict[str, Any]:
+    def predict(self, symbol: str, data: Any = None) -> AdaptivePrediction:
         """
         Make adaptive prediction with learned strategies.
         
@@ -63,20 +270,21 @@ class AdaptiveLearningAgent(BaseAgent):
             Adaptive prediction with recommended strategy
         """
         # Detect current market regime
-        market_regime = self._detect_market_regime(data) if data is not None else 'sideways'
+        regime = self._detect_regime_code(data, symbol) if data is not None else Regime.SIDEWAYS
+        market_regime = _REGIME_NAMES[regime]
         
         # Get strategy for current regime
-        strategy = self.regime_strategies.get(market_regime, self.regime_strategies['sideways'])
+        strategy = self._strategies[regime]
         
         # Calculate adaptive model weights
         adaptive_weights = self._calculate_adaptive_weights()
         
-        result = {
-            'market_regime': market_regime,
-            'recommended_strategy': strategy,
-            'adaptive_weights': adaptive_weights,
-            'confidence_adjustment': strategy['confidence_boost']
-        }
+        result = AdaptivePrediction(
+            market_regime,
+            strategy,
+            adaptive_weights,
+            strategy['confidence_boost']
+        )
         
         self.log_decision(
             f"Adaptive strategy selected for {market_regime} market",
@@ -85,6 +293,26 @@ class AdaptiveLearningAgent(BaseAgent):
         
         return result
     
+    @property
+    def regime_strategies(self) -> MappingProxyType:
+        """
+        Read-only view of the strategies keyed by regime name.
+
+        The view is rebuilt from the code-indexed table, so adding or replacing a
+        regime through it would be lost; it raises instead. Assign a whole mapping
+        to the property to replace strategies (the strategy dicts themselves are shared).
+        """
+        return MappingProxyType(dict(zip(_REGIME_NAMES, self._strategies)))
+    
+    @regime_strategies.setter
+    def regime_strategies(self, strategies: Dict[str, Dict[str, Any]]):
+        unknown = [name for name in strategies if name not in _REGIME_NAMES]
+        if unknown:
+            self.logger.warning(f"Ignoring strategies for unknown regimes: {unknown}")
+        self._strategies = [
+            strategies.get(name, current) for name, current in zip(_REGIME_NAMES, self._strategies)
+        ]
+    
     def learn_from_error(self, model_type: str, predicted: float, actual: float):
         """
         Learn from prediction error and update model weights.
@@ -94,43 +322,98 @@ class AdaptiveLearningAgent(BaseAgent):
             predicted: Predicted value
             actual: Actual value
         """
-        if model_type not in self.model_performance:
+        perf = self.model_performance.get(model_type)
+        if perf is None:
             return
         
         # Calculate error
-        error = abs(actual - predicted) / actual
-        
-        # Store error
-        self.model_performance[model_type]['errors'].append(error)
+        error = _relative_error(actual, predicted)
+        
+        # Store error in the ring buffer, overwriting the oldest entry when full,
+        # and keep the running sums of the full buffer and the recent window in step
+        buf = perf['buf']
+        head = perf['head']
+        count = perf['count']
+        if count == _ERROR_HISTORY:
+            perf['sum'] += error - float(buf[head])
+        else:
+            perf['sum'] += error
+        if count >= _RECENT_ERRORS:
+            perf['recent_sum'] += error - float(buf[(head - _RECENT_ERRORS) % _ERROR_HISTORY])
+        else:
+            perf['recent_sum'] += error
+        buf[head] = error
+        head = (head + 1) % _ERROR_HISTORY
+        perf['head'] = head
+        perf['count'] = count = count + 1 if count < _ERROR_HISTORY else _ERROR_HISTORY
         
-        # Keep only recent errors
-        if len(self.model_performance[model_type]['errors']) > 100:
-            self.model_performance[model_type]['errors'] = \
-                self.model_performance[model_type]['errors'][-100:]
+        # Re-derive the sums from the buffer once per wrap to cancel rounding drift
+        if head == 0:
+            self._resync_error_sums(perf)
         
-        # Update model weight based on performance
-        recent_errors = self.model_performance[model_type]['errors'][-20:]
-        avg_error = np.mean(recent_errors)
+        # Update model weight based on the mean of the recent errors
+        avg_error = perf['recent_sum'] / (count if count < _RECENT_ERRORS else _RECENT_ERRORS)
         
-        # Lower error = higher weight
+        # Lower error = higher weight, blended in with an exponential moving average
         new_weight = 1.0 / (1.0 + avg_error)
-        
-        # Apply exponential moving average for smooth updates
-        old_weight = self.model_performance[model_type]['weights']
-        self.model_performance[model_type]['weights'] = (
-            self.learning_rate * new_weight + 
-            (1 - self.learning_rate) * old_weight
-        )
+        perf['weights'] = self.learning_rate * new_weight + (1.0 - self.learning_rate) * perf['weights']
+        self._weights_dirty = True
         
         self.log_decision(
             f"Weight updated for {model_type}",
             {
                 'error': error,
                 'avg_error': avg_error,
-                'new_weight': self.model_performance[model_type]['weights']
+                'new_weight': perf['weights']
             }
         )
     
+    @staticmethod
+    def _new_performance_record(weight: float = 1.0) -> Dict[str, Any]:
+        """
+        Create an empty per-model performance record backed by an error ring buffer.
+        
+        ``sum`` and ``recent_sum`` are running totals of all buffered errors and of
+        the last ``_RECENT_ERRORS`` of them, so averages never reduce the buffer.
+        """
+        return {
+            'buf': np.zeros(_ERROR_HISTORY), 'head': 0, 'count': 0,
+            'sum': 0.0, 'recent_sum': 0.0, 'weights': weight
+        }
+    
+    @staticmethod
+    def _recent_errors(perf: Dict[str, Any], n: int) -> np.ndarray:
+        """
+        Get up to the last ``n`` recorded errors in chronological order.
+        
+        Args:
+            perf: Per-model performance record
+            n: Maximum number of errors to return
+            
+        Returns:
+            Array of recent errors (oldest first)
+        """
+        n = min(n, perf['count'])
+        idx = np.arange(perf['head'] - n, perf['head']) % _ERROR_HISTORY
+        return perf['buf'][idx]
+    
+    @classmethod
+    def _restore_errors(cls, perf: Dict[str, Any], errors: Any):
+        """Refill a performance record's ring buffer from a chronological list of errors"""
+        errors = np.asarray(errors, dtype=np.float64)[-_ERROR_HISTORY:]
+        count = len(errors)
+        perf['buf'][:] = 0.0
+        perf['buf'][:count] = errors
+        perf['head'] = count % _ERROR_HISTORY
+        perf['count'] = count
+        cls._resync_error_sums(perf)
+    
+    @classmethod
+    def _resync_error_sums(cls, perf: Dict[str, Any]):
+        """Recompute a performance record's running error sums from its buffer"""
+        perf['sum'] = float(cls._recent_errors(perf, _ERROR_HISTORY).sum())
+        perf['recent_sum'] = float(cls._recent_errors(perf, _RECENT_ERRORS).sum())
+    
     def _calculate_adaptive_weights(self) -> Dict[str, float]:
         """
         Calculate adaptive weights for ensemble based on recent performance.
@@ -138,19 +421,25 @@ class AdaptiveLearningAgent(BaseAgent):
         Returns:
             Dictionary of normalized model weights
         """
-        weights = {}
-        total_weight = 0
-        
-        for model_type, perf_data in self.model_performance.items():
-            weights[model_type] = perf_data['weights']
-            total_weight += perf_data['weights']
+        # Callers get their own copy; the result ends up in ensemble agents and cached results
+        if not self._weights_dirty and self._cached_adaptive_weights is not None:
+            return dict(self._cached_adaptive_weights)
+        
+        models = list(self.model_performance)
+        weights = np.fromiter(
+            (self.model_performance[model]['weights'] for model in models),
+            dtype=np.float64,
+            count=len(models)
+        )
         
         # Normalize weights
+        total_weight = weights.sum()
         if total_weight > 0:
-            for model_type in weights:
-                weights[model_type] /= total_weight
+            weights /= total_weight
         
-        return weights
+        self._cached_adaptive_weights = dict(zip(models, weights.tolist()))
+        self._weights_dirty = False
+        return dict(self._cached_adaptive_weights)
     
     def _detect_market_regime(self, data: Any) -> str:
         """
@@ -162,38 +451,113 @@ class AdaptiveLearningAgent(BaseAgent):
         Returns:
             Market regime string
         """
-        import pandas as pd
+        return _REGIME_NAMES[self._detect_regime_code(data)]
+    
+    def _detect_market_regime_np(self, close: np.ndarray) -> str:
+        """
+        Detect current market regime from a pre-extracted array of closes.
         
-        if not isinstance(data, pd.DataFrame):
-            return 'sideways'
+        Args:
+            close: Close prices, oldest first
+            
+        Returns:
+            Market regime string
+        """
+        return _REGIME_NAMES[self._regime_code_np(close)]
+    
+    @staticmethod
+    def _regime_code_np(close: np.ndarray) -> Regime:
+        """Full-window regime code from an array of closes"""
+        if len(close) < _REGIME_WINDOW:
+            return Regime.SIDEWAYS
+        
+        # Only the last 50 closes matter, so reduce them directly instead of
+        # building full rolling series just to read their final value
+        recent_close = np.ascontiguousarray(close[-_REGIME_WINDOW:], dtype=np.float64)
+        return Regime(_regime_code(recent_close))
+    
+    def _detect_regime_code(self, data: Any, symbol: Optional[str] = None) -> Regime:
+        """
+        Detect current market regime from data as a ``Regime`` code.
         
-        if len(data) < 50:
-            return 'sideways'
+        ``data`` may be a DataFrame with a ``Close`` column or an ndarray of
+        closes. For DataFrames the column is extracted once as float64 and, when
+        ``symbol`` is given, the window sums are kept per symbol so that a call
+        whose data advanced by exactly one bar since the previous call is
+        updated incrementally instead of recomputed.
         
-        # Calculate regime indicators
-        recent_data = data.tail(50)
+        Args:
+            data: Market data
+            symbol: Optional stock symbol enabling incremental updates
+            
+        Returns:
+            Market regime code
+        """
+        if isinstance(data, np.ndarray):
+            return self._regime_code_np(data)
         
-        # Trend detection
-        sma_20 = recent_data['Close'].rolling(20).mean().iloc[-1]
-        sma_50 = recent_data['Close'].rolling(50).mean().iloc[-1]
-        current_price = recent_data['Close'].iloc[-1]
+        try:
+            close = data['Close'].to_numpy(dtype=np.float64, copy=False)
+        except (KeyError, TypeError, AttributeError, IndexError, ValueError):
+            return Regime.SIDEWAYS
+
+        if symbol is None or len(close) < _REGIME_WINDOW:
+            return self._regime_code_np(close)
+
+        code = self._advance_regime_state(symbol, data, close)
+        if code is not None:
+            return Regime(code)
+
+        regime = self._regime_code_np(close)
+        try:
+            last_label = data.index[-1]
+        except (AttributeError, IndexError):
+            return regime
+
+        self._sma_state[symbol] = _RegimeWindow(close[-_REGIME_WINDOW:], last_label, regime)
+        self._sma_state.move_to_end(symbol)
+        if len(self._sma_state) > _REGIME_STATE_CACHE_SIZE:
+            self._sma_state.popitem(last=False)
+
+        return regime
+    
+    def _advance_regime_state(self, symbol: str, data: Any, close: Any) -> Optional[int]:
+        """
+        Try to reuse the cached regime state for ``symbol``.
         
-        # Volatility detection
-        volatility = recent_data['Close'].pct_change().std()
+        Returns:
+            Regime code, or None when the state must be rebuilt from the full window
+        """
+        state = self._sma_state.get(symbol)
+        if state is None:
+            return None
         
-        # Determine regime
-        if volatility > 0.03:  # High volatility
-            return 'volatile'
-        elif current_price > sma_20 > sma_50:  # Uptrend
-            return 'bull'
-        elif current_price < sma_20 < sma_50:  # Downtrend
-            return 'bear'
-        else:
-            return 'sideways'
+        try:
+            last_label = data.index[-1]
+            prev_label = data.index[-2]
+        except (AttributeError, IndexError):
+            return None
+        
+        latest_close = float(close[-1])
+        if last_label == state.last_label:
+            # Same bar as last time; only reuse it if the close was not revised
+            if latest_close != state.last_close:
+                return None
+            self._sma_state.move_to_end(symbol)
+            return state.code
+        
+        # Rebuild after a gap, a revised previous close, or once a full window of
+        # incremental updates has accumulated (bounds floating-point drift)
+        if (prev_label != state.last_label or float(close[-2]) != state.last_close
+                or state.steps >= _REGIME_WINDOW):
+            return None
+        
+        self._sma_state.move_to_end(symbol)
+        return state.advance(latest_close, last_label)
     
     def update_strategy_performance(
         self,
-        regime: str,
+        regime: Any,
         predicted: float,
         actual: float
     ):
@@ -201,76 +565,113 @@ class AdaptiveLearningAgent(BaseAgent):
         Update strategy performance for a specific market regime.
         
         Args:
-            regime: Market regime
+            regime: Market regime name or ``Regime`` code
             predicted: Predicted value
             actual: Actual value
         """
-        if regime not in self.regime_strategies:
+        code = _REGIME_CODES.get(regime) if isinstance(regime, str) else regime
+        if code is None or not 0 <= code < len(self._strategies):
             return
+        strategy = self._strategies[code]
         
-        error = abs(actual - predicted) / actual
+        error = _relative_error(actual, predicted)
         
         # Adjust confidence boost based on performance
         if error < 0.05:  # Good prediction
-            self.regime_strategies[regime]['confidence_boost'] += 0.01
+            strategy['confidence_boost'] += 0.01
         elif error > 0.15:  # Poor prediction
-            self.regime_strategies[regime]['confidence_boost'] -= 0.01
+            strategy['confidence_boost'] -= 0.01
         
-        # Keep confidence boost in reasonable range
-        self.regime_strategies[regime]['confidence_boost'] = np.clip(
-            self.regime_strategies[regime]['confidence_boost'],
-            -0.2, 0.2
-        )
+        # Keep confidence boost in reasonable range (plain float clamp, no ufunc dispatch)
+        boost = strategy['confidence_boost']
+        strategy['confidence_boost'] = -0.2 if boost < -0.2 else 0.2 if boost > 0.2 else boost
         
         self.log_decision(
-            f"Strategy performance updated for {regime} regime",
+            f"Strategy performance updated for {_REGIME_NAMES[code]} regime",
             {
                 'error': error,
-                'new_confidence_boost': self.regime_strategies[regime]['confidence_boost']
+                'new_confidence_boost': strategy['confidence_boost']
             }
         )
     
     def get_confidence(self, prediction: Any, data: Any) -> float:
         """Get confidence for adaptive predictions"""
-        if isinstance(prediction, dict):
-            base_confidence = 0.7
-            adjustment = prediction.get('confidence_adjustment', 0.0)
-            return min(1.0, max(0.0, base_confidence + adjustment))
+        if isinstance(prediction, (dict, AdaptivePrediction)):
+            confidence = 0.7 + prediction.get('confidence_adjustment', 0.0)
+            return 0.0 if confidence < 0.0 else 1.0 if confidence > 1.0 else confidence
         return 0.7
     
-    def save_learning_state(self, filepath: str = "model/adaptive_learning_state.json"):
-        """Save learning state for persistence"""
+    def save_learning_state(self, filepath: str = "model/adaptive_learning_state.json", pretty: bool = False):
+        """
+        Save learning state for persistence.
+        
+        The state is written as compact JSON (indented when ``pretty`` is set) to a
+        temporary file which then atomically replaces ``filepath``, so a crash
+        mid-write never leaves a truncated state file behind.
+        """
+        metadata = dict(self.metadata)
+        if isinstance(metadata.get('created_at'), (int, float)):
+            metadata['created_at'] = datetime.fromtimestamp(metadata['created_at']).isoformat()
+        
         state = {
+            'schema_version': _STATE_SCHEMA_VERSION,
             'model_performance': {
                 k: {
                     'weights': v['weights'],
-                    'recent_errors': v['errors'][-20:] if v['errors'] else []
+                    'recent_errors': self._recent_errors(v, _RECENT_ERRORS).tolist()
                 }
                 for k, v in self.model_performance.items()
             },
-            'regime_strategies': self.regime_strategies,
+            'regime_strategies': dict(self.regime_strategies),
             'adaptive_weights': self.adaptive_weights,
-            'metadata': self.metadata,
+            'metadata': metadata,
             'timestamp': datetime.now().isoformat()
         }
         
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, 'w') as f:
-            json.dump(state, f, indent=2)
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_dump_state(state, pretty=pretty))
+        os.replace(tmp_path, filepath)
         
         self.logger.info(f"Learning state saved to {filepath}")
     
     def load_learning_state(self, filepath: str = "model/adaptive_learning_state.json"):
-        """Load previous learning state"""
+        """
+        Load previous learning state.
+        
+        The file is validated before anything is applied: an unknown schema
+        version or non-finite/negative recent errors rejects the whole state.
+        
+        Returns:
+            True if the state was restored, False otherwise
+        """
         try:
-            with open(filepath, 'r') as f:
-                state = json.load(f)
+            with open(filepath, 'rb') as f:
+                state = json.loads(f.read())
             
-            # Restore model performance
+            schema_version = state.get('schema_version', 1)
+            if schema_version not in (1, _STATE_SCHEMA_VERSION):
+                self.logger.warning(
+                    f"Could not load learning state: unsupported schema version {schema_version}"
+                )
+                return False
+            
+            restored_errors = {}
             for model_type, perf_data in state.get('model_performance', {}).items():
-                if model_type in self.model_performance:
-                    self.model_performance[model_type]['weights'] = perf_data.get('weights', 1.0)
-                    self.model_performance[model_type]['errors'] = perf_data.get('recent_errors', [])
+                if model_type not in self.model_performance:
+                    continue
+                errors = np.asarray(perf_data.get('recent_errors', []), dtype=np.float64)
+                if errors.ndim != 1 or not np.all(np.isfinite(errors)) or np.any(errors < 0.0):
+                    self.logger.warning(f"Could not load learning state: invalid errors for {model_type}")
+                    return False
+                restored_errors[model_type] = (float(perf_data.get('weights', 1.0)), errors)
+            
+            # Restore model performance
+            for model_type, (weight, errors) in restored_errors.items():
+                self.model_performance[model_type]['weights'] = weight
+                self._restore_errors(self.model_performance[model_type], errors)
+            self._weights_dirty = True
             
             # Restore regime strategies
             self.regime_strategies = state.get('regime_strategies', self.regime_strategies)
@@ -288,12 +689,12 @@ class AdaptiveLearningAgent(BaseAgent):
             'model_performance': {
                 model: {
                     'weight': perf['weights'],
-                    'avg_error': np.mean(perf['errors']) if perf['errors'] else 0,
-                    'predictions_count': len(perf['errors'])
+                    'avg_error': perf['sum'] / perf['count'] if perf['count'] else 0,
+                    'predictions_count': perf['count']
                 }
                 for model, perf in self.model_performance.items()
             },
-            'regime_strategies': self.regime_strategies,
+            'regime_strategies': dict(self.regime_strategies),
             'adaptive_weights': self.adaptive_weights,
             'overall_accuracy': self.get_accuracy()
         }
@@ -4,7 +4,19 @@ Base agent class for the agentic prediction system.
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 import logging
-from datetime import datetime
+import time
+from math import fabs
+
+
+def _relative_error(actual: float, predicted: float) -> float:
+    """
+    Relative prediction error ``|actual - predicted| / |actual|`` on plain floats.
+    
+    A zero ``actual`` is replaced by a tiny epsilon instead of raising
+    ZeroDivisionError.
+    """
+    denominator = actual if actual != 0.0 else 1e-12
+    return fabs(actual - predicted) / fabs(denominator)
 
 
 class BaseAgent(ABC):
@@ -22,7 +34,8 @@ class BaseAgent(ABC):
         self.confidence_threshold = confidence_threshold
         self.logger = logging.getLogger(f"Agent.{name}")
         self.metadata = {
-            'created_at': datetime.now(),
+            # Epoch seconds; converted to ISO format only when serialised
+            'created_at': time.time(),
             'predictions_made': 0,
             'successful_predictions': 0
         }
@@ -66,7 +79,7 @@ class BaseAgent(ABC):
         self.metadata['predictions_made'] += 1
         
         # Consider prediction successful if within 5% error
-        error_rate = abs(actual - predicted) / actual
+        error_rate = _relative_error(actual, predicted)
         if error_rate <= 0.05:
             self.metadata['successful_predictions'] += 1
     
@@ -84,5 +97,7 @@ class BaseAgent(ABC):
             decision: Decision description
             details: Additional decision details
         """
-        self.logger.info(f"Agent {self.name}: {decision}")
-        self.logger.debug(f"Details: {details}")
+        self.logger.info("Agent %s: %s", self.name, decision)
+        # Skip formatting the details payload unless debug logging is on
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Details: %s", details)
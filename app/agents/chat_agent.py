@@ -1,22 +1,125 @@
 """
 Intelligent Chat Agent with Ollama LLM integration for natural language understanding
 """
-import re
+import json
 import logging
+import threading
+from collections import deque
+from itertools import cycle
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 import random
 
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+
 from app.agents.base_agent import BaseAgent
 from app.db.services.chat_service import ChatService
-from app.db.services.prediction_service import PredictionService
 from app.db.services.watchlist_service import WatchlistDBService
-from app.services.ollama_chat_service import OllamaChatService
+from app.services.ollama_chat_service import OllamaChatService, _SYMBOL_RE
 from app.services.nse_securities_service import NSESecuritiesService
-from app.utils.util import get_db_connection
+from app.db.session_manager import get_session_manager
 
 
 logger = logging.getLogger(__name__)
 
+# Pool for independent chat DB reads that a reply waits on
+_IO_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='chat-io')
+# Fire-and-forget conversation writes get their own single worker, so a write backlog
+# never delays the reads above (and SQLite serializes writers anyway)
+_WRITE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-write')
+
+def _log_background_failure(future) -> None:
+    """Done-callback for fire-and-forget chat writes: surface failures in the log."""
+    exc = future.exception()
+    if exc is not None:
+        logger.error(f"Background chat write failed: {exc}", exc_info=exc)
+
+
+# Quotes are refreshed by the background worker, so a short TTL keeps popular symbols off the DB
+_QUOTE_CACHE = TTLCache(maxsize=4096, ttl=30)
+_QUOTE_LOCK = threading.RLock()
+
+
+_QUOTE_COLUMNS = '''
+    SELECT security_id, company_name, current_value, change, p_change, 
+           day_high, day_low, high_52week, low_52week, updated_on
+    FROM stock_quotes 
+'''
+
+
+@cached(_QUOTE_CACHE, lock=_QUOTE_LOCK)
+def _get_quote(symbol: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up the latest quote for a symbol (or company name match).
+
+    Results, including misses, are cached for a few seconds. Treat the returned dict as read-only.
+    """
+    with get_session_manager().get_session() as conn:
+        # Exact (case-insensitive) security_id first - served by idx_stock_quotes_security_id_nocase
+        row = conn.execute(_QUOTE_COLUMNS + 'WHERE security_id = ? COLLATE NOCASE LIMIT 1', (symbol,)).fetchone()
+        if not row:
+            # Company-name substring match can't use an index, so only run it on a miss
+            row = conn.execute(_QUOTE_COLUMNS + 'WHERE company_name LIKE ? LIMIT 1', (f'%{symbol}%',)).fetchone()
+
+    # Pooled connections use sqlite3.Row, so the selected columns map straight onto keys
+    return dict(row) if row else None
+
+
+def _get_quotes(symbols: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Batch form of ``_get_quote`` sharing its cache.
+
+    Every uncached symbol is resolved by one security_id query; only symbols it misses fall back
+    to the per-symbol company-name match.
+    """
+    quotes = {}
+    missing = []
+    with _QUOTE_LOCK:
+        for symbol in symbols:
+            key = hashkey(symbol)
+            if key in _QUOTE_CACHE:
+                quotes[symbol] = _QUOTE_CACHE[key]
+            else:
+                missing.append(symbol)
+
+    if missing:
+        with get_session_manager().get_session() as conn:
+            rows = conn.execute(
+                _QUOTE_COLUMNS + 'WHERE security_id COLLATE NOCASE IN (SELECT value FROM json_each(?))',
+                (json.dumps(missing),)
+            ).fetchall()
+            by_id = {row['security_id'].upper(): dict(row) for row in rows}
+            for symbol in missing:
+                quote = by_id.get(symbol.upper())
+                if quote is None:
+                    row = conn.execute(_QUOTE_COLUMNS + 'WHERE company_name LIKE ? LIMIT 1', (f'%{symbol}%',)).fetchone()
+                    quote = dict(row) if row else None
+                quotes[symbol] = quote
+
+        with _QUOTE_LOCK:
+            for symbol in missing:
+                _QUOTE_CACHE[hashkey(symbol)] = quotes[symbol]
+
+    return {symbol: quotes[symbol] for symbol in symbols}
+
+
+# Watchlists can also change outside the chat (web UI, auth_service), so this TTL only spans a burst of
+# turns - long enough that the context builder and a watchlist handler share one read per turn
+_WATCHLIST_CACHE = TTLCache(maxsize=1024, ttl=10)
+_WATCHLIST_LOCK = threading.RLock()
+
+
+@cached(_WATCHLIST_CACHE, key=lambda user_id: user_id, lock=_WATCHLIST_LOCK)
+def _watchlist_for(user_id: int) -> tuple:
+    """Return the user's watchlist entries, cached briefly. Call _forget_watchlist after chat edits."""
+    return tuple(WatchlistDBService.get_by_user(user_id))
+
+
+def _forget_watchlist(user_id: int) -> None:
+    with _WATCHLIST_LOCK:
+        _WATCHLIST_CACHE.pop(user_id, None)
+
 
 class ChatAgent(BaseAgent):
     """
@@ -29,7 +132,37 @@ class ChatAgent(BaseAgent):
     - Self-awareness about capabilities and limitations
     - Adaptive learning from feedback
     """
-    
+
+    # Canned replies - class-level tuples so handlers don't rebuild them per call
+    _GREETINGS = (
+        "Hello! I'm your StockSense AI assistant. I can help you with stock prices, predictions, and market insights. What would you like to know?",
+        "Hi there! Ready to explore the market together? I can provide stock information, predictions, and learn your preferences. How can I assist you?",
+        "Greetings! I'm here to help you make informed investment decisions. Ask me about stocks, predictions, or your watchlist!",
+    )
+
+    _FAREWELLS = (
+        "Goodbye! I'll be here whenever you need market insights. Happy investing!",
+        "See you later! I'm always learning to serve you better. Take care!",
+        "Farewell! Remember, I'm here 24/7 to help with your stock queries. Until next time!",
+    )
+
+    _THANKS_RESPONSES = (
+        "You're welcome! I'm learning from our conversations to serve you better. Feel free to ask anything else!",
+        "Happy to help! Each interaction helps me understand your preferences better. What else can I do for you?",
+        "Glad I could assist! I'm constantly improving based on feedback like yours. Anything else you'd like to know?",
+    )
+
+    _GENERAL_RESPONSES = (
+        "I'm here to help with stock market insights! Try asking me about stock prices, predictions, or your watchlist. "
+        "I'm learning to understand more types of questions, so feel free to experiment!",
+        
+        "I can provide information on stocks, predictions, and market data. What specific information are you looking for? "
+        "The more we chat, the better I understand your needs!",
+        
+        "I'm your AI assistant for stock market analysis. While I'm still learning to handle all types of questions, "
+        "I'm great at providing stock prices, predictions, and watchlist information. What can I help you with?",
+    )
+
     def __init__(self):
         super().__init__(name="ChatAgent", confidence_threshold=0.7)
         
@@ -55,6 +188,62 @@ class ChatAgent(BaseAgent):
             "I'm constantly learning and may make mistakes"
         ]
 
+        # Canned replies rotate round-robin rather than drawing from the RNG on every turn
+        self._greeting_cycle = cycle(self._GREETINGS)
+        self._farewell_cycle = cycle(self._FAREWELLS)
+        self._thanks_cycle = cycle(self._THANKS_RESPONSES)
+        self._general_cycle = cycle(self._GENERAL_RESPONSES)
+
+        # Static response text is built once; handlers only interpolate per-turn values
+        self._help_text = (
+            "🤖 **I'm your AI-powered StockSense Assistant!**\n\n"
+            "**What I can do:**\n"
+            + "".join(f"• {cap}\n" for cap in self.capabilities)
+            + "\n**My limitations:**\n"
+            + "".join(f"• {lim}\n" for lim in self.limitations)
+            + "\n**Examples:**\n"
+            "• 'What's the price of RELIANCE?'\n"
+            "• 'Predict TCS stock'\n"
+            "• 'Show my watchlist'\n"
+            "• 'Tell me about yourself'\n"
+            "\n💡 I learn from every interaction to serve you better!"
+        )
+        self._about_template = (
+            "🧠 **About Me**\n\n"
+            "I'm an AI chat agent built specifically for StockSense. Here's what makes me unique:\n\n"
+            "**Self-Aware**: I understand my capabilities AND limitations\n"
+            "**Always Learning**: I learn from every conversation to improve my responses\n"
+            "**Context-Aware**: I remember our conversations and your preferences\n"
+            "**Honest**: I tell you when I'm uncertain or when I make mistakes\n"
+            "**Helpful**: My goal is to help you make informed decisions\n\n"
+            "**My Stats:**\n"
+            "• Conversations with you: {history}\n"
+            "• Total predictions made: {preds}\n"
+            "• Success rate: {acc:.1%}\n\n"
+            "I'm constantly evolving. Your feedback helps me improve! 🚀"
+        )
+        self._learning_intro = (
+            "📚 **How I Learn**\n\n"
+            "I improve through multiple mechanisms:\n\n"
+            "1. **Conversation Patterns**: I analyze successful interactions\n"
+            "2. **User Preferences**: I track stocks you're interested in\n"
+            "3. **Feedback**: Positive/negative sentiment helps me adjust\n"
+            "4. **Context Memory**: I remember our conversation history\n"
+            "5. **Performance Tracking**: I monitor my accuracy and improve\n\n"
+        )
+        self._learning_outro = "Every interaction makes me smarter! Keep chatting with me to help me serve you better. 🎓"
+
+        # Action dispatch table, built once; every handler takes (user_id, entities, llm_response)
+        self._action_handlers = {
+            'get_stock_price': self._handle_get_price,
+            'run_prediction': self._handle_run_prediction,
+            'add_watchlist': self._handle_add_watchlist,
+            'remove_watchlist': self._handle_remove_watchlist,
+            'view_watchlist': self._handle_view_watchlist,
+            'display_stock_values': self._handle_display_values,
+            'list_available_stocks': self._handle_list_stocks,
+        }
+
     def predict(self, symbol: str, data: Any) -> Dict[str, Any]:
         """Make prediction (for BaseAgent interface compatibility)"""
         return {'prediction': None, 'confidence': 0.0}
@@ -78,11 +267,12 @@ class ChatAgent(BaseAgent):
         logger.info(f"Processing chat message from user {user_id}: {message}")
         
         try:
-            # Get user preferences
-            preferences = ChatService.get_user_preferences(user_id) or {}
-
-            # Get conversation history for context
-            history = ChatService.get_conversation_history(user_id, limit=5)
+            # Get user preferences and conversation history concurrently - they are independent reads
+            prefs_future = _IO_POOL.submit(ChatService.get_user_preferences, user_id)
+            history_future = _IO_POOL.submit(ChatService.get_conversation_history, user_id, limit=5)
+            preferences = prefs_future.result() or {}
+            stored_prefs = dict(preferences)  # as persisted; handlers replace (never mutate) the lists in preferences
+            history = history_future.result()
 
             # Build context for Ollama
             ollama_context = self._build_ollama_context(user_id, preferences, context)
@@ -124,17 +314,20 @@ class ChatAgent(BaseAgent):
                 intent=intent,
                 response=final_response['message'],
                 action=action,
-                entities=entities
+                entities=entities,
+                current_prefs=preferences,
+                stored_prefs=stored_prefs
             )
 
-            # Save conversation
-            ChatService.save_conversation(
+            # Save conversation in the background - the caller doesn't need the row id
+            _WRITE_POOL.submit(
+                ChatService.save_conversation,
                 user_id=user_id,
                 message=message,
                 response=final_response['message'],
                 context={'intent': intent, 'action': action, 'entities': entities},
                 sentiment='neutral'
-            )
+            ).add_done_callback(_log_background_failure)
 
             return final_response
 
@@ -149,13 +342,7 @@ class ChatAgent(BaseAgent):
     def _handle_greeting(self, user_id: int, message: str, preferences: Dict,
                         history: List, context: Dict) -> Dict[str, Any]:
         """Handle greeting messages"""
-        greetings = [
-            "Hello! I'm your StockSense AI assistant. I can help you with stock prices, predictions, and market insights. What would you like to know?",
-            "Hi there! Ready to explore the market together? I can provide stock information, predictions, and learn your preferences. How can I assist you?",
-            "Greetings! I'm here to help you make informed investment decisions. Ask me about stocks, predictions, or your watchlist!"
-        ]
-        
-        response = random.choice(greetings)  # nosec B311
+        response = next(self._greeting_cycle)
         
         # Personalize based on history
         if len(history) > 0:
@@ -175,14 +362,8 @@ class ChatAgent(BaseAgent):
     def _handle_goodbye(self, user_id: int, message: str, preferences: Dict,
                        history: List, context: Dict) -> Dict[str, Any]:
         """Handle goodbye messages"""
-        farewells = [
-            "Goodbye! I'll be here whenever you need market insights. Happy investing!",
-            "See you later! I'm always learning to serve you better. Take care!",
-            "Farewell! Remember, I'm here 24/7 to help with your stock queries. Until next time!"
-        ]
-        
         return {
-            'message': random.choice(farewells),  # nosec B311
+            'message': next(self._farewell_cycle),
             'intent': 'goodbye',
             'context': {}
         }
@@ -190,25 +371,19 @@ class ChatAgent(BaseAgent):
     def _handle_thanks(self, user_id: int, message: str, preferences: Dict,
                       history: List, context: Dict) -> Dict[str, Any]:
         """Handle thank you messages"""
-        responses = [
-            "You're welcome! I'm learning from our conversations to serve you better. Feel free to ask anything else!",
-            "Happy to help! Each interaction helps me understand your preferences better. What else can I do for you?",
-            "Glad I could assist! I'm constantly improving based on feedback like yours. Anything else you'd like to know?"
-        ]
-        
         # Mark this as positive feedback
         self.metadata['successful_predictions'] += 1
         
         return {
-            'message': random.choice(responses),  # nosec B311
+            'message': next(self._thanks_cycle),
             'context': {}
         }
     
     def _handle_stock_price(self, user_id: int, message: str, preferences: Dict,
                            history: List, context: Dict) -> Dict[str, Any]:
         """Handle stock price queries"""
-        # Extract stock symbol from message
-        symbols = re.findall(r'\b([A-Z]{2,})\b', message)
+        # Use symbols already extracted upstream, otherwise pull them from the message
+        symbols = context.get('symbols') or _SYMBOL_RE.findall(message)
         
         if not symbols:
             return {
@@ -220,45 +395,20 @@ class ChatAgent(BaseAgent):
         symbol = symbols[0]
         
         try:
-            # Get stock data directly from database
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Try to find by security_id first
-            cursor.execute('''
-                SELECT security_id, company_name, current_value, change, p_change, 
-                       day_high, day_low, high_52week, low_52week, updated_on
-                FROM stock_quotes 
-                WHERE UPPER(security_id) = UPPER(?) OR UPPER(company_name) LIKE UPPER(?)
-                LIMIT 1
-            ''', (symbol, f'%{symbol}%'))
-            
-            row = cursor.fetchone()
-            conn.close()
+            quote_data = _get_quote(symbol)
             
-            if row:
-                # Explicit field mapping for safety
-                quote_data = {
-                    'security_id': row[0],
-                    'company_name': row[1],
-                    'current_value': row[2],
-                    'change': row[3],
-                    'p_change': row[4],
-                    'day_high': row[5],
-                    'day_low': row[6],
-                    'high_52week': row[7],
-                    'low_52week': row[8],
-                    'updated_on': row[9]
-                }
-                response = f"📊 **{quote_data['company_name']}** ({quote_data['security_id']})\n\n"
-                response += f"Current Price: ₹{quote_data['current_value']:.2f}\n"
-                response += f"Change: ₹{quote_data['change']:.2f} ({quote_data['p_change']:.2f}%)\n"
-                response += f"Day High: ₹{quote_data['day_high']:.2f} | Day Low: ₹{quote_data['day_low']:.2f}\n"
-                response += f"52-Week High: ₹{quote_data['high_52week']:.2f} | 52-Week Low: ₹{quote_data['low_52week']:.2f}\n"
-                response += f"\nUpdated: {quote_data['updated_on']}"
+            if quote_data:
+                response = (
+                    f"📊 **{quote_data['company_name']}** ({quote_data['security_id']})\n\n"
+                    f"Current Price: ₹{quote_data['current_value']:.2f}\n"
+                    f"Change: ₹{quote_data['change']:.2f} ({quote_data['p_change']:.2f}%)\n"
+                    f"Day High: ₹{quote_data['day_high']:.2f} | Day Low: ₹{quote_data['day_low']:.2f}\n"
+                    f"52-Week High: ₹{quote_data['high_52week']:.2f} | 52-Week Low: ₹{quote_data['low_52week']:.2f}\n"
+                    f"\nUpdated: {quote_data['updated_on']}"
+                )
                 
                 # Add to user's preferred stocks for learning
-                self._update_stock_preference(user_id, quote_data['security_id'])
+                self._update_stock_preference(user_id, quote_data['security_id'], preferences)
                 
                 return {
                     'message': response,
@@ -282,7 +432,7 @@ class ChatAgent(BaseAgent):
     def _handle_prediction(self, user_id: int, message: str, preferences: Dict,
                           history: List, context: Dict) -> Dict[str, Any]:
         """Handle prediction queries"""
-        symbols = re.findall(r'\b([A-Z]{2,})\b', message)
+        symbols = context.get('symbols') or _SYMBOL_RE.findall(message)
         
         if not symbols:
             return {
@@ -293,29 +443,27 @@ class ChatAgent(BaseAgent):
         
         symbol = symbols[0]
         
+        # Only this handler needs predictions, so the service is imported on first use
+        from app.db.services.prediction_service import PredictionService
+
         try:
-            # Get all predictions and filter by symbol (security_id)
-            all_predictions = PredictionService.get_all(limit=100)
-            predictions = [p for p in all_predictions if p.stock_symbol and p.stock_symbol.upper() == symbol.upper()]
-            
-            # If no exact match, try by security_id in the database
-            if not predictions:
-                predictions = [p for p in all_predictions if symbol.upper() in (p.company_name or '').upper()]
+            # Indexed lookup by symbol, falling back to a company-name match
+            predictions = PredictionService.get_by_symbol(symbol)
             
             if predictions:
                 pred = predictions[0]
-                response = f"🔮 **AI Prediction for {symbol}**\n\n"
-                response += f"Current Price: ₹{pred.current_price:.2f}\n"
-                response += f"Predicted Price: ₹{pred.predicted_price:.2f}\n"
-                
                 change_pct = ((pred.predicted_price - pred.current_price) / pred.current_price) * 100
                 direction = "↗️ increase" if change_pct > 0 else "↘️ decrease"
-                response += f"Expected Change: {abs(change_pct):.2f}% {direction}\n"
-                response += f"Prediction Date: {pred.prediction_date}\n\n"
-                
-                response += "⚠️ **Important**: This is an AI-generated prediction based on historical data. "
-                response += "I'm learning to improve accuracy, but please don't rely solely on this for investment decisions. "
-                response += "Always do your own research!"
+                response = (
+                    f"🔮 **AI Prediction for {symbol}**\n\n"
+                    f"Current Price: ₹{pred.current_price:.2f}\n"
+                    f"Predicted Price: ₹{pred.predicted_price:.2f}\n"
+                    f"Expected Change: {abs(change_pct):.2f}% {direction}\n"
+                    f"Prediction Date: {pred.prediction_date}\n\n"
+                    "⚠️ **Important**: This is an AI-generated prediction based on historical data. "
+                    "I'm learning to improve accuracy, but please don't rely solely on this for investment decisions. "
+                    "Always do your own research!"
+                )
                 
                 return {
                     'message': response,
@@ -340,20 +488,22 @@ class ChatAgent(BaseAgent):
                          history: List, context: Dict) -> Dict[str, Any]:
         """Handle watchlist queries"""
         try:
-            watchlist = WatchlistDBService.get_by_user(user_id)
+            watchlist = _watchlist_for(user_id)
             
             if watchlist:
-                response = f"📋 **Your Watchlist** ({len(watchlist)} stocks)\n\n"
-                for item in watchlist[:5]:  # Show top 5
-                    response += f"• {item.company_name} ({item.stock_symbol})\n"
+                parts = [f"📋 **Your Watchlist** ({len(watchlist)} stocks)\n\n"]
+                parts.extend(f"• {item.company_name} ({item.stock_symbol})\n" for item in watchlist[:5])  # Show top 5
                 
                 if len(watchlist) > 5:
-                    response += f"\n... and {len(watchlist) - 5} more stocks"
+                    parts.append(f"\n... and {len(watchlist) - 5} more stocks")
                 
-                response += "\n\nI'm learning your preferences from your watchlist to provide better recommendations!"
+                parts.append("\n\nI'm learning your preferences from your watchlist to provide better recommendations!")
+                response = "".join(parts)
             else:
-                response = "Your watchlist is empty. Would you like me to suggest some stocks based on market trends? "
-                response += "I learn from your choices to provide personalized recommendations!"
+                response = (
+                    "Your watchlist is empty. Would you like me to suggest some stocks based on market trends? "
+                    "I learn from your choices to provide personalized recommendations!"
+                )
             
             return {
                 'message': response,
@@ -371,25 +521,8 @@ class ChatAgent(BaseAgent):
     def _handle_help(self, user_id: int, message: str, preferences: Dict,
                     history: List, context: Dict) -> Dict[str, Any]:
         """Handle help requests"""
-        response = "🤖 **I'm your AI-powered StockSense Assistant!**\n\n"
-        response += "**What I can do:**\n"
-        for cap in self.capabilities:
-            response += f"• {cap}\n"
-        
-        response += "\n**My limitations:**\n"
-        for lim in self.limitations:
-            response += f"• {lim}\n"
-        
-        response += "\n**Examples:**\n"
-        response += "• 'What's the price of RELIANCE?'\n"
-        response += "• 'Predict TCS stock'\n"
-        response += "• 'Show my watchlist'\n"
-        response += "• 'Tell me about yourself'\n"
-        
-        response += "\n💡 I learn from every interaction to serve you better!"
-        
         return {
-            'message': response,
+            'message': self._help_text,
             'intent': 'help',
             'context': {'capabilities_shown': True}
         }
@@ -397,20 +530,10 @@ class ChatAgent(BaseAgent):
     def _handle_about(self, user_id: int, message: str, preferences: Dict,
                      history: List, context: Dict) -> Dict[str, Any]:
         """Handle questions about the agent itself"""
-        response = "🧠 **About Me**\n\n"
-        response += "I'm an AI chat agent built specifically for StockSense. Here's what makes me unique:\n\n"
-        response += "**Self-Aware**: I understand my capabilities AND limitations\n"
-        response += "**Always Learning**: I learn from every conversation to improve my responses\n"
-        response += "**Context-Aware**: I remember our conversations and your preferences\n"
-        response += "**Honest**: I tell you when I'm uncertain or when I make mistakes\n"
-        response += "**Helpful**: My goal is to help you make informed decisions\n\n"
-        
-        response += f"**My Stats:**\n"
-        response += f"• Conversations with you: {len(history)}\n"
-        response += f"• Total predictions made: {self.metadata['predictions_made']}\n"
-        response += f"• Success rate: {self.get_accuracy():.1%}\n\n"
-        
-        response += "I'm constantly evolving. Your feedback helps me improve! 🚀"
+        # Stats are read once per turn, then interpolated into the prebuilt template
+        preds = self.metadata['predictions_made']
+        acc = self.get_accuracy()
+        response = self._about_template.format(history=len(history), preds=preds, acc=acc)
         
         return {
             'message': response,
@@ -421,18 +544,13 @@ class ChatAgent(BaseAgent):
     def _handle_learning(self, user_id: int, message: str, preferences: Dict,
                         history: List, context: Dict) -> Dict[str, Any]:
         """Handle questions about learning"""
-        response = "📚 **How I Learn**\n\n"
-        response += "I improve through multiple mechanisms:\n\n"
-        response += "1. **Conversation Patterns**: I analyze successful interactions\n"
-        response += "2. **User Preferences**: I track stocks you're interested in\n"
-        response += "3. **Feedback**: Positive/negative sentiment helps me adjust\n"
-        response += "4. **Context Memory**: I remember our conversation history\n"
-        response += "5. **Performance Tracking**: I monitor my accuracy and improve\n\n"
-        
         if preferences.get('preferred_stocks'):
-            response += f"For example, I've learned you're interested in: {', '.join(preferences['preferred_stocks'][:3])}\n\n"
-        
-        response += "Every interaction makes me smarter! Keep chatting with me to help me serve you better. 🎓"
+            response = (
+                f"{self._learning_intro}For example, I've learned you're interested in: "
+                f"{', '.join(preferences['preferred_stocks'][:3])}\n\n{self._learning_outro}"
+            )
+        else:
+            response = self._learning_intro + self._learning_outro
         
         return {
             'message': response,
@@ -443,18 +561,7 @@ class ChatAgent(BaseAgent):
     def _handle_general(self, user_id: int, message: str, preferences: Dict,
                        history: List, context: Dict) -> Dict[str, Any]:
         """Handle general queries"""
-        responses = [
-            "I'm here to help with stock market insights! Try asking me about stock prices, predictions, or your watchlist. "
-            "I'm learning to understand more types of questions, so feel free to experiment!",
-            
-            "I can provide information on stocks, predictions, and market data. What specific information are you looking for? "
-            "The more we chat, the better I understand your needs!",
-            
-            "I'm your AI assistant for stock market analysis. While I'm still learning to handle all types of questions, "
-            "I'm great at providing stock prices, predictions, and watchlist information. What can I help you with?"
-        ]
-        
-        response = random.choice(responses)  # nosec B311
+        response = next(self._general_cycle)
         
         # Suggest based on preferences
         if preferences.get('preferred_stocks'):
@@ -474,9 +581,16 @@ class ChatAgent(BaseAgent):
         intent: str,
         response: str,
         action: Optional[str] = None,
-        entities: Optional[Dict] = None
+        entities: Optional[Dict] = None,
+        current_prefs: Optional[Dict] = None,
+        stored_prefs: Optional[Dict] = None
     ):
-        """Learn from the interaction"""
+        """
+        Learn from the interaction.
+
+        Pass ``current_prefs`` when already loaded to skip a re-read, and ``stored_prefs`` (the values
+        as persisted, before any handler updates) so unchanged preferences are not written back.
+        """
         # Update metadata
         self.metadata['predictions_made'] += 1
         
@@ -496,58 +610,65 @@ class ChatAgent(BaseAgent):
             interaction_style = 'detailed'
         
         # Update user preferences
-        current_prefs = ChatService.get_user_preferences(user_id) or {}
-        topics = current_prefs.get('topics_of_interest', [])
+        if current_prefs is None:
+            current_prefs = ChatService.get_user_preferences(user_id) or {}
+        if stored_prefs is None:
+            stored_prefs = dict(current_prefs)
+        topics = deque(current_prefs.get('topics_of_interest', []), maxlen=10)  # Keep last 10 topics
         
         # Add intent to topics of interest
         if intent not in topics and intent != 'general':
             topics.append(intent)
-            topics = topics[-10:]  # Keep last 10 topics
         
-        # Track symbols if mentioned
-        symbols_tracked = current_prefs.get('symbols_tracked', [])
+        # Track symbols if mentioned; handlers may already have recorded some in current_prefs
         if entities and entities.get('symbols'):
             for sym in entities['symbols']:
-                if sym not in symbols_tracked:
-                    symbols_tracked.append(sym)
-            symbols_tracked = symbols_tracked[-20:]
-
-        ChatService.update_user_preferences(
-            user_id=user_id,
-            interaction_style=interaction_style,
-            topics_of_interest=topics,
-            preferred_stocks=entities.get('symbols', []) if entities else []
-        )
+                self._update_stock_preference(user_id, sym, current_prefs)
+
+        topics = list(topics)
+        preferred_stocks = current_prefs.get('preferred_stocks', [])
+
+        # Single write for everything learned this turn, skipped when nothing changed
+        if (interaction_style != stored_prefs.get('interaction_style')
+                or topics != stored_prefs.get('topics_of_interest')
+                or preferred_stocks != stored_prefs.get('preferred_stocks')):
+            ChatService.update_user_preferences(
+                user_id=user_id,
+                interaction_style=interaction_style,
+                topics_of_interest=topics,
+                preferred_stocks=preferred_stocks
+            )
         
         logger.info(f"Learned from interaction - Intent: {intent}, Action: {action}")
 
-    def _update_stock_preference(self, user_id: int, symbol: str):
-        """Update user's preferred stocks"""
-        prefs = ChatService.get_user_preferences(user_id) or {}
+    def _update_stock_preference(self, user_id: int, symbol: str, prefs: Optional[Dict] = None) -> List[str]:
+        """
+        Record a stock in the user's preferred stocks.
+
+        The updated list is stored back into ``prefs`` and returned; it is persisted by the
+        single preference write in ``_learn_from_interaction`` rather than written here.
+        """
+        if prefs is None:
+            prefs = ChatService.get_user_preferences(user_id) or {}
         preferred = prefs.get('preferred_stocks', [])
         
         if symbol not in preferred:
-            preferred.append(symbol)
-            preferred = preferred[-20:]  # Keep last 20 stocks
-            
-            ChatService.update_user_preferences(
-                user_id=user_id,
-                preferred_stocks=preferred
-            )
+            recent = deque(preferred, maxlen=20)  # Keep last 20 stocks
+            recent.append(symbol)
+            preferred = prefs['preferred_stocks'] = list(recent)
+
+        return preferred
 
     def _build_ollama_context(self, user_id: int, preferences: Dict, context: Optional[Dict]) -> Dict[str, Any]:
         """Build context information for Ollama LLM"""
         try:
-            conn = get_db_connection()
-
             # Get user's watchlist
-            watchlist = WatchlistDBService.get_by_user(user_id)
+            watchlist = _watchlist_for(user_id)
             watchlist_symbols = [w.stock_symbol for w in watchlist] if watchlist else []
 
             # Get available NSE stocks count
-            stocks_count = self.nse_service.get_security_count(conn)
-
-            conn.close()
+            with get_session_manager().get_session() as conn:
+                stocks_count = self.nse_service.get_security_count(conn)
 
             return {
                 'watchlist': watchlist_symbols,
@@ -563,20 +684,10 @@ class ChatAgent(BaseAgent):
                       intent: str, llm_response: str, preferences: Dict, context: Dict) -> Dict[str, Any]:
         """Handle action detected by Ollama LLM"""
 
-        handlers = {
-            'get_stock_price': lambda: self._handle_get_price(user_id, entities, llm_response),
-            'run_prediction': lambda: self._handle_run_prediction(user_id, entities, llm_response),
-            'add_watchlist': lambda: self._handle_add_watchlist(user_id, entities, llm_response),
-            'remove_watchlist': lambda: self._handle_remove_watchlist(user_id, entities, llm_response),
-            'view_watchlist': lambda: self._handle_view_watchlist(user_id, llm_response),
-            'display_stock_values': lambda: self._handle_display_values(user_id, entities, llm_response),
-            'list_available_stocks': lambda: self._handle_list_stocks(user_id, entities, llm_response),
-        }
-
-        handler = handlers.get(action)
+        handler = self._action_handlers.get(action)
         if handler:
             try:
-                return handler()
+                return handler(user_id, entities, llm_response)
             except Exception as e:
                 logger.error(f"Error handling action {action}: {e}")
                 return {
@@ -603,34 +714,25 @@ class ChatAgent(BaseAgent):
                 'context': {}
             }
 
-        conn = get_db_connection()
         prices_info = []
 
-        for symbol in symbols[:3]:  # Limit to 3 symbols
-            try:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT company_name, current_value, change, p_change, day_high, day_low
-                    FROM stock_quotes 
-                    WHERE UPPER(security_id) = UPPER(?) OR UPPER(company_name) LIKE UPPER(?)
-                    LIMIT 1
-                ''', (symbol, f'%{symbol}%'))
-
-                row = cursor.fetchone()
-                if row:
-                    prices_info.append({
-                        'symbol': symbol,
-                        'company': row[0],
-                        'price': row[1],
-                        'change': row[2],
-                        'pchange': row[3],
-                        'high': row[4],
-                        'low': row[5]
-                    })
-            except Exception as e:
-                logger.error(f"Error getting price for {symbol}: {e}")
-
-        conn.close()
+        try:
+            quotes = _get_quotes(symbols[:3])  # Limit to 3 symbols, fetched in one round trip
+        except Exception as e:
+            logger.error(f"Error getting prices for {', '.join(symbols[:3])}: {e}")
+            quotes = {}
+
+        for symbol, quote in quotes.items():
+            if quote:
+                prices_info.append({
+                    'symbol': symbol,
+                    'company': quote['company_name'],
+                    'price': quote['current_value'],
+                    'change': quote['change'],
+                    'pchange': quote['p_change'],
+                    'high': quote['day_high'],
+                    'low': quote['day_low']
+                })
 
         if not prices_info:
             return {
@@ -639,11 +741,12 @@ class ChatAgent(BaseAgent):
                 'context': {}
             }
 
-        price_text = llm_response + "\n\n**Stock Prices:**\n"
-        for info in prices_info:
-            price_text += f"\n{info['symbol']} ({info['company']}): ₹{info['price']}\n"
-            price_text += f"  Change: {info['change']} ({info['pchange']}%)\n"
-            price_text += f"  Range: ₹{info['low']} - ₹{info['high']}"
+        price_text = llm_response + "\n\n**Stock Prices:**\n" + "".join(
+            f"\n{info['symbol']} ({info['company']}): ₹{info['price']}\n"
+            f"  Change: {info['change']} ({info['pchange']}%)\n"
+            f"  Range: ₹{info['low']} - ₹{info['high']}"
+            for info in prices_info
+        )
 
         return {
             'message': price_text,
@@ -678,28 +781,26 @@ class ChatAgent(BaseAgent):
         try:
             added = []
 
+            # Resolve every requested symbol in one query instead of one round trip per symbol. The symbols
+            # are bound as a single JSON array so the SQL text (and its cached statement) never varies.
+            wanted = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+            with get_session_manager().get_session() as conn:
+                rows = conn.execute(
+                    'SELECT security_id, company_name FROM stock_quotes '
+                    'WHERE security_id COLLATE NOCASE IN (SELECT value FROM json_each(?))',
+                    (json.dumps(wanted),)
+                ).fetchall()
+            companies = {row[0].upper(): row[1] for row in rows}
+
             for symbol in symbols:
-                # Get stock info from database
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT id, company_name FROM stock_quotes 
-                    WHERE UPPER(security_id) = UPPER(?)
-                    LIMIT 1
-                ''', (symbol,))
-                row = cursor.fetchone()
-                conn.close()
-
-                if row:
-                    stock_id = row[0]
-                    company_name = row[1]
+                if symbol.upper() in companies:
                     # Add to watchlist using the correct method
-                    success = WatchlistDBService.add(user_id, symbol, company_name)
+                    success = WatchlistDBService.add(user_id, symbol, companies[symbol.upper()])
                     if success:
                         added.append(symbol)
 
-
             if added:
+                _forget_watchlist(user_id)
                 return {
                     'message': f"✅ Added {', '.join(added)} to your watchlist!",
                     'intent': 'watchlist',
@@ -729,15 +830,15 @@ class ChatAgent(BaseAgent):
             'context': {'action': 'remove', 'symbols': symbols}
         }
 
-    def _handle_view_watchlist(self, user_id: int, llm_response: str) -> Dict[str, Any]:
+    def _handle_view_watchlist(self, user_id: int, entities: Dict, llm_response: str) -> Dict[str, Any]:
         """Handle viewing watchlist"""
         try:
-            watchlist = WatchlistDBService.get_by_user(user_id)
+            watchlist = _watchlist_for(user_id)
 
             if watchlist:
-                watchlist_text = llm_response + "\n\n**Your Watchlist:**\n"
-                for item in watchlist:
-                    watchlist_text += f"- {item.stock_symbol}: {item.company_name}\n"
+                watchlist_text = llm_response + "\n\n**Your Watchlist:**\n" + "".join(
+                    f"- {item.stock_symbol}: {item.company_name}\n" for item in watchlist
+                )
 
                 return {
                     'message': watchlist_text,
@@ -771,22 +872,19 @@ class ChatAgent(BaseAgent):
     def _handle_list_stocks(self, user_id: int, entities: Dict, llm_response: str) -> Dict[str, Any]:
         """Handle listing available NSE stocks"""
         try:
-            conn = get_db_connection()
-
             search_query = entities.get('search_query')
-            if search_query:
-                stocks = self.nse_service.search_securities(conn, search_query)
-                title = f"Found {len(stocks)} matching stocks:"
-            else:
-                stocks = self.nse_service.get_available_securities(conn, limit=20)
-                title = f"Top 20 available NSE stocks (total: {self.nse_service.get_security_count(conn)}):"
-
-            conn.close()
+            with get_session_manager().get_session() as conn:
+                if search_query:
+                    stocks = self.nse_service.search_securities(conn, search_query)
+                    title = f"Found {len(stocks)} matching stocks:"
+                else:
+                    stocks = self.nse_service.get_available_securities(conn, limit=20)
+                    title = f"Top 20 available NSE stocks (total: {self.nse_service.get_security_count(conn)}):"
 
             if stocks:
-                stocks_text = llm_response + f"\n\n**{title}**\n"
-                for stock in stocks:
-                    stocks_text += f"- {stock['scrip_code']}: {stock['company_name']}\n"
+                stocks_text = llm_response + f"\n\n**{title}**\n" + "".join(
+                    f"- {stock['scrip_code']}: {stock['company_name']}\n" for stock in stocks
+                )
 
                 return {
                     'message': stocks_text,
@@ -37,6 +37,7 @@ import asyncio
 import json
 import logging
 import os
+import re
 import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional
@@ -66,6 +67,9 @@ _TOOL_TIMEOUT: int = int(os.getenv("COPILOT_TOOL_TIMEOUT", "30"))
 _API_TIMEOUT: int = int(os.getenv("COPILOT_API_TIMEOUT", "60"))
 # Maximum agentic loop iterations to prevent infinite loops
 _MAX_ITERATIONS: int = int(os.getenv("COPILOT_MAX_ITERATIONS", "10"))
+# Ticker markers in user prompts for the offline mock: **TICKER**, else a SYMBOL.NS / SYMBOL.BO style word
+_BOLD_TICKER_RE = re.compile(r'\*\*([A-Z0-9.\-]+)\*\*')
+_SUFFIXED_TICKER_RE = re.compile(r'\b([A-Z0-9]+\.(?:BO|NS|BSE|NSE))\b')
 
 
 class CopilotSession:
@@ -251,16 +255,15 @@ class CopilotSession:
         """
         ticker = None
         # Extract ticker from the bold **TICKER** marker in the user message
-        import re
         for msg in reversed(self._messages):
             if msg["role"] == "user":
                 # Look for **TICKER** pattern first (our standard prompt format)
-                match = re.search(r'\*\*([A-Z0-9.\-]+)\*\*', msg["content"])
+                match = _BOLD_TICKER_RE.search(msg["content"])
                 if match:
                     ticker = match.group(1)
                     break
                 # Fallback: look for word ending in .BO or .NS
-                match = re.search(r'\b([A-Z0-9]+\.(?:BO|NS|BSE|NSE))\b', msg["content"])
+                match = _SUFFIXED_TICKER_RE.search(msg["content"])
                 if match:
                     ticker = match.group(1)
                     break
@@ -1,17 +1,33 @@
 """
 Ensemble agent that combines predictions from multiple Ollama AI calls for improved accuracy.
 """
-import numpy as np
-from typing import Dict, Any
+from statistics import median
+from typing import Dict, Any, Sequence, Tuple
 import logging
 
+import pandas as pd
+
 from app.agents.base_agent import BaseAgent
-from app.models.ollama_model import predict_with_details
+from app.models.ollama_model import predict_many_with_details
+
+
+def _mean_std(values: Sequence[float]) -> Tuple[float, float]:
+    """Population mean and standard deviation of a short list, without NumPy dispatch overhead"""
+    n = len(values)
+    mean = sum(values) / n
+    variance = sum((value - mean) ** 2 for value in values) / n
+    return mean, variance ** 0.5
 
 
 class EnsembleAgent(BaseAgent):
     """Agent that uses ensemble methods to combine multiple Ollama AI predictions"""
 
+    # Default confidence based on analysis type
+    _BASE_CONFIDENCE = {
+        'technical': 0.75,
+        'fundamental': 0.70
+    }
+
     def __init__(self, name: str = "EnsembleAI", confidence_threshold: float = 0.7):
         super().__init__(name, confidence_threshold)
         # Use different Ollama analysis prompts/perspectives as "models"
@@ -34,11 +50,15 @@ class EnsembleAgent(BaseAgent):
         confidences = []
         model_details = []
         
-        # Get predictions from Ollama (we'll call it multiple times with emphasis on different aspects)
+        # Get predictions from Ollama (we'll call it multiple times with emphasis on different aspects).
+        # The history and prompt are built once and the calls run concurrently; the caller's
+        # (already enriched) price history is reused instead of downloading it again.
+        history = data if isinstance(data, pd.DataFrame) and {'Close', 'Volume'}.issubset(data.columns) else None
+        results = predict_many_with_details(symbol, self.analysis_types, history)
+
         for analysis_type in self.analysis_types:
             try:
-                # Call Ollama with different emphasis
-                result = predict_with_details(symbol)
+                result = results[analysis_type]
 
                 # Store prediction and confidence
                 pred = result['predicted_price']
@@ -79,7 +99,7 @@ class EnsembleAgent(BaseAgent):
             'ensemble_method': self.ensemble_method,
             'model_details': model_details,
             'num_models': len(predictions),
-            'uncertainty': float(np.std(predictions))
+            'uncertainty': float(_mean_std(predictions)[1])
         }
         
         self.log_decision(
@@ -91,25 +111,20 @@ class EnsembleAgent(BaseAgent):
     
     def _combine_predictions(self, predictions, confidences) -> float:
         """Combine predictions using the configured ensemble method"""
-        predictions = np.array(predictions)
-        confidences = np.array(confidences)
-        
-        if self.ensemble_method == 'average':
-            return float(np.mean(predictions))
-
-        elif self.ensemble_method == 'weighted_average':
+        # The ensemble only has a handful of members, so plain Python beats NumPy here
+        if self.ensemble_method == 'weighted_average':
             # Weight by confidence
-            if np.sum(confidences) == 0:
-                return float(np.mean(predictions))
-            weights = confidences / np.sum(confidences)
-            return float(np.sum(predictions * weights))
+            total_confidence = sum(confidences)
+            if total_confidence == 0:
+                return float(sum(predictions) / len(predictions))
+            return float(sum(p * c for p, c in zip(predictions, confidences)) / total_confidence)
 
         elif self.ensemble_method == 'voting':
             # Use median as robust voting mechanism
-            return float(np.median(predictions))
+            return float(median(predictions))
 
         else:
-            return float(np.mean(predictions))
+            return float(sum(predictions) / len(predictions))
 
     def _calculate_ensemble_confidence(self, confidences) -> float:
         """Calculate overall confidence from individual model confidences"""
@@ -117,16 +132,14 @@ class EnsembleAgent(BaseAgent):
             return 0.0
         
         # Use weighted average with variance penalty
-        mean_conf = np.mean(confidences)
-        variance_penalty = 1.0 - (np.std(confidences) / (mean_conf + 1e-6))
+        mean_conf, std_conf = _mean_std(confidences)
+        variance_penalty = 1.0 - (std_conf / (mean_conf + 1e-6))
         
         return float(mean_conf * max(0.5, variance_penalty))
 
     def _calculate_prediction_interval(self, predictions):
         """Calculate prediction interval based on model variance"""
-        predictions = np.array(predictions)
-        mean = np.mean(predictions)
-        std = np.std(predictions)
+        mean, std = _mean_std(predictions)
         
         # 95% confidence interval
         lower = mean - 1.96 * std
@@ -138,13 +151,7 @@ class EnsembleAgent(BaseAgent):
         """
         Get confidence score for a specific Ollama analysis type.
         """
-        # Default confidence based on analysis type
-        base_confidence = {
-            'technical': 0.75,
-            'fundamental': 0.70
-        }
-
-        return base_confidence.get(model_type, 0.6)
+        return self._BASE_CONFIDENCE.get(model_type, 0.6)
     
     def get_confidence(self, prediction: Any, data: Any) -> float:
         """Get confidence for ensemble prediction"""
@@ -1,16 +1,86 @@
 """
 Prediction coordinator that orchestrates multiple agents for optimal predictions.
 """
+import copy
 import numpy as np
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 import logging
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from itertools import islice
+
+from cachetools import TTLCache
 
 from app.agents.ensemble_agent import EnsembleAgent
 from app.agents.data_enrichment_agent import DataEnrichmentAgent
 from app.agents.adaptive_learning_agent import AdaptiveLearningAgent
 from app.agents.prediction_evaluator_agent import PredictionEvaluatorAgent
 from app.agents.outcome_evaluator_agent import OutcomeEvaluatorAgent
+from app.agents.base_agent import _relative_error
+
+_RESULT_CACHE_SIZE = 1024
+_RESULT_CACHE_TTL = 60.0  # seconds; back-to-back requests for a symbol reuse the last run
+_DECISION_HISTORY_SIZE = 1000
+
+# Trust score weights: confidence, data quality and (inverted) uncertainty
+_CONFIDENCE_WEIGHT = 0.5
+_DATA_QUALITY_WEIGHT = 0.3
+_UNCERTAINTY_WEIGHT = 0.2
+
+
+@dataclass(slots=True)
+class PerformanceMetrics:
+    """
+    Running coordinator counters.
+
+    Scores are accumulated as plain sums and only turned into averages when
+    read, so recording a prediction is a handful of additions. Supports
+    ``metrics['key']`` and ``metrics.get('key')`` like the dict it replaces.
+    """
+    total_predictions: int = 0
+    high_confidence_predictions: int = 0
+    validated_predictions: int = 0
+    blocked_predictions: int = 0
+    confidence_sum: float = 0.0
+    evaluation_score_sum: float = 0.0
+    evaluated_predictions: int = 0
+    outcome_score_sum: float = 0.0
+    completed_outcomes: int = 0
+
+    @property
+    def average_confidence(self) -> float:
+        return self.confidence_sum / max(1, self.total_predictions)
+
+    @property
+    def average_evaluation_score(self) -> float:
+        return self.evaluation_score_sum / max(1, self.evaluated_predictions)
+
+    @property
+    def average_outcome_score(self) -> float:
+        return self.outcome_score_sum / max(1, self.completed_outcomes)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_predictions': self.total_predictions,
+            'high_confidence_predictions': self.high_confidence_predictions,
+            'validated_predictions': self.validated_predictions,
+            'average_confidence': self.average_confidence,
+            'average_evaluation_score': self.average_evaluation_score,
+            'average_outcome_score': self.average_outcome_score,
+            'blocked_predictions': self.blocked_predictions,
+        }
 
 
 class PredictionCoordinator:
@@ -53,19 +123,15 @@ class PredictionCoordinator:
         # Load previous learning state if exists
         self.adaptive_agent.load_learning_state()
         
-        # Decision history for adaptive learning
-        self.decision_history = []
+        # Decision history for adaptive learning (only the most recent decisions are kept)
+        self.decision_history = deque(maxlen=_DECISION_HISTORY_SIZE)
+
+        # Recent results keyed by (symbol, validate) so repeated requests skip the agent chain
+        self._result_cache = TTLCache(maxsize=_RESULT_CACHE_SIZE, ttl=_RESULT_CACHE_TTL, timer=time.monotonic)
+        self._result_cache_lock = threading.RLock()
         
         # Performance tracking
-        self.performance_metrics = {
-            'total_predictions': 0,
-            'high_confidence_predictions': 0,
-            'validated_predictions': 0,
-            'average_confidence': 0.0,
-            'average_evaluation_score': 0.0,
-            'average_outcome_score': 0.0,
-            'blocked_predictions': 0,
-        }
+        self.performance_metrics = PerformanceMetrics()
     
     def predict(self, symbol: str, validate: bool = True) -> Dict[str, Any]:
         """
@@ -78,6 +144,13 @@ class PredictionCoordinator:
         Returns:
             Comprehensive prediction with confidence, agents used, and metadata
         """
+        cache_key = (symbol, validate)
+        with self._result_cache_lock:
+            cached_result = self._result_cache.get(cache_key)
+        if cached_result is not None:
+            self.logger.info(f"Returning cached prediction for {symbol}")
+            return copy.deepcopy(cached_result)
+
         start_time = datetime.now()
         
         self.logger.info(f"Starting agentic prediction for {symbol}")
@@ -176,6 +249,10 @@ class PredictionCoordinator:
         
         # Log decision for transparency
         self._log_decision_record(result)
+
+        # Cache a private deep copy so callers can't mutate nested parts of the stored entry
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = copy.deepcopy(result)
         
         return result
     
@@ -253,18 +330,11 @@ class PredictionCoordinator:
         Returns:
             Trust score between 0 and 1
         """
-        # Weighted combination
-        confidence_weight = 0.5
-        data_quality_weight = 0.3
-        uncertainty_weight = 0.2
-        
-        # Normalize uncertainty (lower is better)
-        normalized_uncertainty = 1.0 / (1.0 + uncertainty)
-        
+        # Weighted combination; uncertainty is normalized as 1 / (1 + u) so lower is better
         trust_score = (
-            confidence * confidence_weight +
-            data_quality * data_quality_weight +
-            normalized_uncertainty * uncertainty_weight
+            confidence * _CONFIDENCE_WEIGHT +
+            data_quality * _DATA_QUALITY_WEIGHT +
+            _UNCERTAINTY_WEIGHT / (1.0 + uncertainty)
         )
         
         return min(1.0, max(0.0, trust_score))
@@ -318,31 +388,25 @@ class PredictionCoordinator:
     
     def _update_performance(self, result: Dict[str, Any]):
         """Update performance metrics"""
-        self.performance_metrics['total_predictions'] += 1
+        metrics = self.performance_metrics
+        metrics.total_predictions += 1
         
         if result['decision'] == 'accept':
-            self.performance_metrics['high_confidence_predictions'] += 1
+            metrics.high_confidence_predictions += 1
         
         if result['decision'] != 'reject':
-            self.performance_metrics['validated_predictions'] += 1
+            metrics.validated_predictions += 1
 
         if result.get('serving_action') == 'block_prediction':
-            self.performance_metrics['blocked_predictions'] += 1
-
-        # Update running average of confidence
-        n = self.performance_metrics['total_predictions']
-        old_avg = self.performance_metrics['average_confidence']
-        new_conf = result['confidence']
-        self.performance_metrics['average_confidence'] = (
-            (old_avg * (n - 1) + new_conf) / n
-        )
+            metrics.blocked_predictions += 1
+
+        # Running sums; averages are derived when the metrics are read
+        metrics.confidence_sum += result['confidence']
 
         evaluation_score = result.get('evaluation', {}).get('score')
         if evaluation_score is not None:
-            old_eval_avg = self.performance_metrics['average_evaluation_score']
-            self.performance_metrics['average_evaluation_score'] = (
-                (old_eval_avg * (n - 1) + evaluation_score) / n
-            )
+            metrics.evaluation_score_sum += evaluation_score
+            metrics.evaluated_predictions += 1
 
     def _log_decision_record(self, result: Dict[str, Any]):
         """Log decision for audit and learning"""
@@ -365,12 +429,9 @@ class PredictionCoordinator:
             'last_close': result.get('evaluation', {}).get('summary_metrics', {}).get('last_close'),
         }
         
+        # The bounded deque drops the oldest decision once it is full
         self.decision_history.append(record)
         
-        # Keep only recent history (last 1000 decisions)
-        if len(self.decision_history) > 1000:
-            self.decision_history = self.decision_history[-1000:]
-        
         self.logger.info(f"Decision recorded: {record}")
     
     def update_with_actual(self, symbol: str, predicted: float, actual: float):
@@ -382,6 +443,8 @@ class PredictionCoordinator:
             predicted: Predicted value
             actual: Actual value
         """
+        self._invalidate_results(symbol)
+
         # Update ensemble agent performance
         self.ensemble_agent.update_performance(actual, predicted)
         
@@ -402,11 +465,11 @@ class PredictionCoordinator:
             )
 
         # Save adaptive learning state periodically
-        if self.performance_metrics['total_predictions'] % 10 == 0:
+        if self.performance_metrics.total_predictions % 10 == 0:
             self.adaptive_agent.save_learning_state()
         
         # Adaptive learning: adjust ensemble method based on performance
-        error_rate = abs(actual - predicted) / actual
+        error_rate = _relative_error(actual, predicted)
         
         if error_rate > 0.10:  # More than 10% error
             self.logger.info(f"High error rate detected for {symbol}: {error_rate:.2%}")
@@ -426,22 +489,15 @@ class PredictionCoordinator:
             matching_record['actual'] = actual
             matching_record['actual_error'] = error_rate
             matching_record['outcome_evaluation'] = outcome_evaluation
-
-        completed_outcomes = len([
-            record for record in self.decision_history if record.get('outcome_evaluation')
-        ])
-        if completed_outcomes:
-            old_avg = self.performance_metrics['average_outcome_score']
-            self.performance_metrics['average_outcome_score'] = (
-                (old_avg * (completed_outcomes - 1) + outcome_evaluation['score']) / completed_outcomes
-            )
+            self.performance_metrics.completed_outcomes += 1
+            self.performance_metrics.outcome_score_sum += outcome_evaluation['score']
 
         return outcome_evaluation
 
     def get_performance_report(self) -> Dict[str, Any]:
         """Get comprehensive performance report"""
         return {
-            'metrics': self.performance_metrics,
+            'metrics': self.performance_metrics.to_dict(),
             'agent_performance': {
                 'data_enrichment_agent': {
                     'accuracy': self.data_agent.get_accuracy(),
@@ -458,26 +514,36 @@ class PredictionCoordinator:
                 'prediction_evaluator_agent': {
                     'evaluations_completed': len(self.decision_history),
                     'latest_action': self.decision_history[-1].get('serving_action') if self.decision_history else None,
-                    'average_score': self.performance_metrics['average_evaluation_score'],
+                    'average_score': self.performance_metrics.average_evaluation_score,
                 },
                 'outcome_evaluator_agent': {
                     'evaluations_completed': len([
                         record for record in self.decision_history if record.get('outcome_evaluation')
                     ]),
-                    'average_score': self.performance_metrics['average_outcome_score'],
+                    'average_score': self.performance_metrics.average_outcome_score,
                 }
             },
-            'recent_decisions': self.decision_history[-10:] if self.decision_history else []
+            'recent_decisions': list(islice(self.decision_history, max(0, len(self.decision_history) - 10), None))
         }
     
     def set_confidence_threshold(self, threshold: float):
         """Update minimum confidence threshold"""
         if 0.0 <= threshold <= 1.0:
             self.min_confidence = threshold
+            self._invalidate_results()
             self.logger.info(f"Confidence threshold updated to {threshold}")
         else:
             raise ValueError("Threshold must be between 0 and 1")
 
+    def _invalidate_results(self, symbol: Optional[str] = None):
+        """Drop cached results for a symbol, or all of them when no symbol is given"""
+        with self._result_cache_lock:
+            if symbol is None:
+                self._result_cache.clear()
+                return
+            for key in [key for key in self._result_cache if key[0] == symbol]:
+                self._result_cache.pop(key, None)
+
     @staticmethod
     def _merge_serving_action(decision: str, evaluation_action: Optional[str]) -> str:
         action_severity = {
@@ -5,6 +5,7 @@ This module provides HTTP endpoints to access the agentic prediction functionali
 """
 from flask import Blueprint, request, jsonify
 import logging
+import threading
 
 from app.agents import PredictionCoordinator
 
@@ -13,12 +14,16 @@ agentic_api = Blueprint('agentic_api', __name__, url_prefix='/api/agentic')
 
 # Initialize coordinator (singleton)
 _coordinator = None
+_coordinator_lock = threading.Lock()
 
 def get_coordinator():
     """Get or create the prediction coordinator singleton"""
     global _coordinator
     if _coordinator is None:
-        _coordinator = PredictionCoordinator(min_confidence=0.6)
+        # Double-checked so concurrent first requests build only one coordinator
+        with _coordinator_lock:
+            if _coordinator is None:
+                _coordinator = PredictionCoordinator(min_confidence=0.6)
     return _coordinator
 
 
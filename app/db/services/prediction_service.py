@@ -74,6 +74,31 @@ class PredictionService:
             return stock
         return None
     
+    @staticmethod
+    def get_by_symbol(symbol: str, limit: int = 1) -> List[Prediction]:
+        """
+        Get the latest predictions for a stock symbol (case-insensitive).
+
+        Falls back to a company-name substring match when no prediction has that symbol.
+        """
+        db = get_session_manager()
+
+        rows = db.fetch_all('''
+            SELECT * FROM predictions
+            WHERE stock_symbol = ? COLLATE NOCASE
+            ORDER BY prediction_date DESC
+            LIMIT ?
+        ''', (symbol, limit))
+        if not rows:
+            rows = db.fetch_all('''
+                SELECT * FROM predictions
+                WHERE company_name LIKE ?
+                ORDER BY prediction_date DESC
+                LIMIT ?
+            ''', (f'%{symbol}%', limit))
+
+        return [Prediction(**row) for row in rows]
+
     _ALLOWED_ORDER_BY = {
         'prediction_date DESC': 'prediction_date DESC',
         'prediction_date ASC': 'prediction_date ASC',
@@ -73,11 +73,13 @@ class WatchlistDBService:
     def exists(user_id: int, stock_symbol: str) -> bool:
         """Check if stock exists in user's watchlist"""
         db = get_session_manager()
+        # Probe the UNIQUE(user_id, stock_symbol) index and stop at the first hit
         row = db.fetch_one('''
-            SELECT COUNT(*) as count FROM watchlists 
+            SELECT 1 FROM watchlists 
             WHERE user_id = ? AND stock_symbol = ?
+            LIMIT 1
         ''', (user_id, stock_symbol))
-        return row['count'] > 0 if row else False
+        return row is not None
 
     @staticmethod
     def clear(user_id: int) -> bool:
@@ -7,6 +7,7 @@ import json
 import logging
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from app.config.ollama_config import OllamaConfig
@@ -16,6 +17,16 @@ from app.utils.util import check_index_existence
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Outermost JSON object in a response, allowing one level of nested braces. The runs between braces
+# are possessive: a brace must follow them anyway, so giving characters back can never help a failed match.
+_JSON_OBJECT_RE = re.compile(r'\{[^{}]*+(?:\{[^{}]*+\}[^{}]*+)*+\}', re.DOTALL)
+
+# Fallback key/value patterns for unstructured responses. They are matched against the lowered
+# response text, so they are compiled without re.IGNORECASE.
+_PRICE_RE = re.compile(r'predicted_price["\']?\s*+:\s*+([0-9.]+)')
+_CONFIDENCE_RE = re.compile(r'confidence["\']?\s*+:\s*+([0-9.]+)')
+_DECISION_RE = re.compile(r'decision["\']?\s*+:\s*+["\']?(\w+)')
+
 def initialize_model():
     """Initialize and validate Ollama connection"""
     try:
@@ -65,7 +76,7 @@ def _parse_ollama_response(response_data):
         logger.debug(f"Ollama response text: {text}")
 
         # Try to extract JSON from the response
-        json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', text, re.DOTALL)
+        json_match = _JSON_OBJECT_RE.search(text)
         if json_match:
             json_str = json_match.group(0)
             data = json.loads(json_str)
@@ -84,18 +95,20 @@ def _parse_ollama_response(response_data):
         confidence = None
         decision = None
 
+        text_lower = text.lower()
+
         # Extract predicted price
-        price_match = re.search(r'predicted_price["\']?\s*:\s*([0-9.]+)', text, re.IGNORECASE)
+        price_match = _PRICE_RE.search(text_lower)
         if price_match:
             predicted_price = float(price_match.group(1))
 
         # Extract confidence
-        conf_match = re.search(r'confidence["\']?\s*:\s*([0-9.]+)', text, re.IGNORECASE)
+        conf_match = _CONFIDENCE_RE.search(text_lower)
         if conf_match:
             confidence = float(conf_match.group(1))
 
-        # Extract decision
-        decision_match = re.search(r'decision["\']?\s*:\s*["\']?(\w+)', text, re.IGNORECASE)
+        # Extract decision (lowered, matching the accept/caution/reject values used downstream)
+        decision_match = _DECISION_RE.search(text_lower)
         if decision_match:
             decision = decision_match.group(1)
 
@@ -177,21 +190,30 @@ JSON Response:"""
         }
 
 
-def predict_with_details(symbol):
-    """Enhanced prediction with detailed analysis using Ollama"""
-    try:
-        # Get current stock data (Alpha Vantage → yfinance fallback)
-        hist = _fetch_stock_history(symbol, period_months=3)
-        if hist.empty:
-            raise ValueError(f"No data found for symbol {symbol}")
+def _recent_history(hist: 'pd.DataFrame', period_months: int) -> 'pd.DataFrame':
+    """
+    Trim pre-loaded price history to the same window _fetch_stock_history would download.
+    """
+    # Imported here so the chat stack can import this module without loading pandas
+    import pandas as pd
 
-        current_price = hist['Close'].iloc[-1]
-        avg_volume = hist['Volume'].mean()
-        price_change = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]) * 100
-        volatility = hist['Close'].pct_change().std() * 100
+    if isinstance(hist.index, pd.DatetimeIndex) and not hist.empty:
+        return hist[hist.index > hist.index[-1] - pd.DateOffset(months=period_months)]
+    return hist
+
+
+def _build_detailed_prompt(symbol, hist):
+    """Build the detailed analysis prompt from recent price history"""
+    if hist.empty:
+        raise ValueError(f"No data found for symbol {symbol}")
 
-        # Create detailed prompt for Ollama
-        prompt = f"""You are a professional stock analyst. Analyze the following stock data for {symbol} and provide a detailed prediction:
+    current_price = hist['Close'].iloc[-1]
+    avg_volume = hist['Volume'].mean()
+    price_change = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]) * 100
+    volatility = hist['Close'].pct_change().std() * 100
+
+    # Create detailed prompt for Ollama
+    return f"""You are a professional stock analyst. Analyze the following stock data for {symbol} and provide a detailed prediction:
 
 Current Price: {current_price:.2f}
 Average Volume: {avg_volume:.0f}
@@ -207,18 +229,71 @@ Please provide a comprehensive analysis and respond with a JSON object containin
 
 JSON Response:"""
 
+
+def _detailed_prompt_for(symbol, hist=None):
+    """Load (or trim the caller's) three months of history and build the detailed prompt"""
+    if hist is None:
+        hist = _fetch_stock_history(symbol, period_months=3)
+    else:
+        hist = _recent_history(hist, period_months=3)
+    return _build_detailed_prompt(symbol, hist)
+
+
+def _detailed_prediction_error(e):
+    logger.error(f"Error in predict_with_details: {e}")
+    return {
+        'predicted_price': 0.0,
+        'confidence': 0.0,
+        'decision': 'reject',
+        'reasoning': f'Detailed prediction error: {str(e)}'
+    }
+
+
+def predict_with_details(symbol, hist=None):
+    """
+    Enhanced prediction with detailed analysis using Ollama
+
+    Args:
+        symbol: Stock symbol
+        hist: Optional pre-loaded OHLCV history; skips the yfinance fetch when given
+    """
+    try:
+        prompt = _detailed_prompt_for(symbol, hist)
         response_data = _call_ollama_with_retry(prompt)
-        result = _parse_ollama_response(response_data)
-        return result
+        return _parse_ollama_response(response_data)
+    except Exception as e:
+        return _detailed_prediction_error(e)
+
+
+def predict_many_with_details(symbol, analysis_types, hist=None):
+    """
+    Run several detailed predictions for one symbol, sharing the history and prompt between them.
+
+    The history is loaded and the prompt built once; the independent Ollama calls then run
+    concurrently.
+
+    Args:
+        symbol: Stock symbol
+        analysis_types: Labels for the predictions to make
+        hist: Optional pre-loaded OHLCV history; skips the yfinance fetch when given
 
+    Returns:
+        Dictionary mapping each analysis type to its prediction result
+    """
+    try:
+        prompt = _detailed_prompt_for(symbol, hist)
     except Exception as e:
-        logger.error(f"Error in predict_with_details: {e}")
-        return {
-            'predicted_price': 0.0,
-            'confidence': 0.0,
-            'decision': 'reject',
-            'reasoning': f'Detailed prediction error: {str(e)}'
-        }
+        error = _detailed_prediction_error(e)
+        return {analysis_type: dict(error) for analysis_type in analysis_types}
+
+    def _predict(_analysis_type):
+        try:
+            return _parse_ollama_response(_call_ollama_with_retry(prompt))
+        except Exception as e:
+            return _detailed_prediction_error(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(analysis_types))) as executor:
+        return dict(zip(analysis_types, executor.map(_predict, analysis_types)))
 
 
 def test_ollama():
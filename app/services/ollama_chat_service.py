@@ -6,6 +6,7 @@ import asyncio
 import concurrent.futures
 import logging
 import json
+import re
 from typing import Dict, Any, Optional
 
 import requests.exceptions
@@ -14,6 +15,42 @@ from app.models.ollama_model import _call_ollama_with_retry
 
 logger = logging.getLogger(__name__)
 
+# Upper-case tokens of two or more letters are treated as candidate stock symbols
+_SYMBOL_RE = re.compile(r'\b[A-Z]{2,}\b')  # no capture group: findall returns the whole match
+# Words for the whole-word cue lookups; punctuation is not part of a word
+_WORD_RE = re.compile(r'[a-z]+')
+
+# Whole-word cues used to refine prediction scope and watchlist actions
+_GROUP_SCOPE_WORDS = frozenset({'watchlist', 'watchlists', 'group', 'groups', 'all'})
+_ADD_WORDS = frozenset({'add', 'adds', 'added', 'adding'})
+_REMOVE_WORDS = frozenset({'remove', 'removes', 'removed', 'removing', 'delete', 'deletes', 'deleted', 'deleting'})
+
+
+def _trie_pattern(words) -> str:
+    """
+    Build a regex alternation for literal words with shared prefixes factored out as a trie.
+
+    ``['current price', 'current value']`` becomes ``current\\ (?:price|value)``, so the engine
+    compares each shared prefix once per position instead of once per word.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end-of-word marker
+
+    def _emit(node) -> str:
+        branches = [re.escape(char) + _emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:%s)' % '|'.join(branches)
+        if '' in node:
+            return body + '?' if len(branches) == 1 and len(body) == 1 else '(?:%s)?' % body
+        return body
+
+    return _emit(trie)
+
 
 def _run_async(coro):
     """
@@ -65,6 +102,24 @@ When user asks about:
 - Watchlist: Offer to add/remove/view
 - NSE stocks: Offer to show available stocks or search specific ones"""
 
+    # (intent, action, keywords) in priority order - the first rule with a keyword in the response wins.
+    # Watchlist actions are resolved separately from the response wording.
+    INTENT_RULES = (
+        ('check_price', 'get_stock_price', ('stock price', 'current price', 'quote', 'value')),
+        ('predict', 'run_prediction', ('predict', 'forecast', 'run prediction')),
+        ('watchlist', None, ('watchlist', 'watch', 'track', 'follow')),
+        ('show_values', 'display_stock_values', ('current value', 'predicted value', 'show', 'display')),
+        ('list_stocks', 'list_available_stocks', ('available stocks', 'nse stocks', 'securities', 'list stocks')),
+    )
+
+    # All rules folded into one regex with a named group per intent (keywords trie-factored). Each alternative is a lookahead that
+    # searches the whole text for that rule's keywords, so a single match() call at position 0 returns the
+    # first rule (in priority order) with a keyword anywhere in the text; lastindex is its rule number + 1.
+    _INTENT_RE = re.compile('|'.join(
+        '(?=.*?(?P<%s>%s))' % (intent, _trie_pattern(words))
+        for intent, _, words in INTENT_RULES
+    ), re.DOTALL)
+
     def __init__(self):
         self.conversation_history = []
 
@@ -209,60 +264,56 @@ Always include what action you're about to take or suggest next steps.
 
 Response:"""
 
-    def _parse_response(self, response: str, user_message: str) -> tuple:
+    @staticmethod
+    def _classify_response(response: str) -> tuple:
         """
-        Parse the LLM response to extract intent and action.
-
-        Returns:
-            Tuple of (intent, action, entities)
+        Resolve (intent, action, prediction_scope) from the LLM response text.
         """
+        # Only case is folded for the keyword scan: multi-word keywords must not match across punctuation
         response_lower = response.lower()
 
-        # Detect intent
-        intent = 'general'
-        action = None
-        entities = {}
-
-        # Stock price intent
-        if any(word in response_lower for word in ['stock price', 'current price', 'quote', 'value']):
-            intent = 'check_price'
-            action = 'get_stock_price'
-
-        # Prediction intent
-        elif any(word in response_lower for word in ['predict', 'forecast', 'run prediction']):
-            intent = 'predict'
-            action = 'run_prediction'
-            # Check if for watchlist or single stock
-            if 'watchlist' in response_lower or 'group' in response_lower or 'all' in response_lower:
-                entities['prediction_scope'] = 'watchlist'
-            else:
-                entities['prediction_scope'] = 'single'
-
-        # Watchlist intent
-        elif any(word in response_lower for word in ['watchlist', 'watch', 'track', 'follow']):
-            intent = 'watchlist'
-            if 'add' in response_lower or 'adding' in response_lower:
+        # One regex call resolves the highest-priority intent
+        match = OllamaChatService._INTENT_RE.match(response_lower)
+        if not match:
+            return 'general', None, None
+
+        intent, action, _ = OllamaChatService.INTENT_RULES[match.lastindex - 1]
+        scope = None
+        if intent in ('predict', 'watchlist'):
+            # Match whole words so e.g. 'actually' or 'address' don't trigger 'all' / 'add'
+            words = frozenset(_WORD_RE.findall(response_lower))
+            if intent == 'predict':
+                # Check if for watchlist or single stock
+                scope = 'single' if words.isdisjoint(_GROUP_SCOPE_WORDS) else 'watchlist'
+            elif not words.isdisjoint(_ADD_WORDS):
                 action = 'add_watchlist'
-            elif 'remove' in response_lower or 'delete' in response_lower:
+            elif not words.isdisjoint(_REMOVE_WORDS):
                 action = 'remove_watchlist'
             else:
                 action = 'view_watchlist'
 
-        # Values display intent
-        elif any(word in response_lower for word in ['current value', 'predicted value', 'show', 'display']):
-            intent = 'show_values'
-            action = 'display_stock_values'
+        return intent, action, scope
 
-        # List stocks intent
-        elif any(word in response_lower for word in ['available stocks', 'nse stocks', 'securities', 'list stocks']):
-            intent = 'list_stocks'
-            action = 'list_available_stocks'
+    def _parse_response(self, response: str, user_message: str) -> tuple:
+        """
+        Parse the LLM response to extract intent and action.
 
-        # Extract stock symbols from both response and original message
-        import re
-        symbols = re.findall(r'\b([A-Z]{2,})\b', response + ' ' + user_message)
+        Returns:
+            Tuple of (intent, action, entities)
+        """
+        intent, action, scope = self._classify_response(response)
+        entities = {}
+        if scope is not None:
+            entities['prediction_scope'] = scope
+
+        # Extract stock symbols from both response and original message (scanned separately, no concatenation).
+        # Symbols are upper-case, so text with no upper-case letters (islower) can skip the regex entirely.
+        symbols = set()
+        for text in (response, user_message):
+            if not text.islower():
+                symbols.update(_SYMBOL_RE.findall(text))
         if symbols:
-            entities['symbols'] = list(set(symbols))  # Remove duplicates
+            entities['symbols'] = list(symbols)
 
         return intent, action, entities
 
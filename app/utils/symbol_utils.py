@@ -17,6 +17,9 @@ EXCHANGE_SUFFIXES = {
 # Common exchange suffixes from Yahoo Finance
 KNOWN_SUFFIXES = {'.NS', '.BO', '.L', '.HK', '.T', '.AX', '.TO', '.SI', '.KS'}
 
+# Base ticker: 1-20 chars, alphanumeric with optional hyphens/underscores
+_TICKER_RE = re.compile(r'^[A-Z0-9][A-Z0-9_\-]{0,19}$')
+
 
 def normalize_symbol(symbol: str, default_exchange: str = 'NSE') -> str:
     """
@@ -112,7 +115,7 @@ def validate_symbol(symbol: str) -> bool:
     if not base:
         return False
     # Ticker should be 1-20 chars, alphanumeric with optional hyphens/underscores
-    return bool(re.match(r'^[A-Z0-9][A-Z0-9_\-]{0,19}$', base))
+    return bool(_TICKER_RE.match(base))
 
 
 def infer_exchange_from_symbol(symbol: str) -> str:
@@ -275,17 +275,32 @@ class SchemaManager:
             # ========== CREATE INDEXES ==========
             self._log("  Creating indexes...")
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_security_id ON stock_quotes (security_id)')
+            # Case-insensitive symbol lookups (security_id = ? COLLATE NOCASE) from the chat agent
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_stock_quotes_security_id_nocase ON stock_quotes (security_id COLLATE NOCASE)'
+            )
             
             # Re-fetch columns to ensure we have the latest state before creating indexes
             cursor.execute("PRAGMA table_info(stock_quotes)")
             sq_cols = [c[1] for c in cursor.fetchall()]
             if 'stock_symbol' in sq_cols:
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_stock_symbol ON stock_quotes (stock_symbol)')
+            if 'industry' in sq_cols:
+                # Covering index for the dashboard sector heatmap: GROUP BY industry becomes an index-only
+                # scan with no temp B-tree, and current_value/p_change are read without touching the table
+                cursor.execute(
+                    'CREATE INDEX IF NOT EXISTS idx_stock_quotes_industry_change '
+                    'ON stock_quotes (industry, current_value, p_change)'
+                )
             
             cursor.execute("PRAGMA table_info(predictions)")
             p_cols = [c[1] for c in cursor.fetchall()]
             if 'stock_symbol' in p_cols:
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_predictions_stock_symbol ON predictions (stock_symbol)')
+                cursor.execute(
+                    'CREATE INDEX IF NOT EXISTS idx_predictions_stock_symbol_nocase '
+                    'ON predictions (stock_symbol COLLATE NOCASE, prediction_date)'
+                )
 
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_watchlists_user_id ON watchlists (user_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_watchlist_user_id ON user_watchlist (user_id)')
@@ -294,6 +309,9 @@ class SchemaManager:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_notifications_sent ON notifications(sent)')
 
             conn.commit()
+
+            # Refresh planner statistics so the new indexes are picked up
+            cursor.execute('PRAGMA optimize')
             self._log("\n✓ Schema initialization completed successfully!")
 
             # Show table statistics
@@ -0,0 +1,304 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.adaptive_learning_agent import (
+    AdaptiveLearningAgent,
+    AdaptivePrediction,
+    Regime,
+    _regime_kernel,
+    _regime_kernel_numpy,
+)
+
+
+def _market_data(close):
+    index = pd.date_range(end=datetime(2026, 3, 24), periods=len(close), freq='D')
+    return pd.DataFrame({'Close': np.asarray(close, dtype=float)}, index=index)
+
+
+def _reference_regime(data):
+    recent_data = data.tail(50)
+    sma_20 = recent_data['Close'].rolling(20).mean().iloc[-1]
+    sma_50 = recent_data['Close'].rolling(50).mean().iloc[-1]
+    current_price = recent_data['Close'].iloc[-1]
+    volatility = recent_data['Close'].pct_change().std()
+
+    if volatility > 0.03:
+        return 'volatile'
+    elif current_price > sma_20 > sma_50:
+        return 'bull'
+    elif current_price < sma_20 < sma_50:
+        return 'bear'
+    return 'sideways'
+
+
+def test_detect_market_regime_classifies_trends():
+    agent = AdaptiveLearningAgent()
+
+    assert agent._detect_market_regime(_market_data(np.linspace(100, 120, 80))) == 'bull'
+    assert agent._detect_market_regime(_market_data(np.linspace(120, 100, 80))) == 'bear'
+    assert agent._detect_market_regime(_market_data(np.full(80, 100.0))) == 'sideways'
+    assert agent._detect_market_regime(_market_data([100.0, 110.0] * 40)) == 'volatile'
+
+
+def test_detect_market_regime_matches_rolling_reference():
+    agent = AdaptiveLearningAgent()
+    rng = np.random.default_rng(7)
+
+    for scale in (0.005, 0.02, 0.04):
+        data = _market_data(100 * np.cumprod(1 + rng.normal(0, scale, 120)))
+        assert agent._detect_market_regime(data) == _reference_regime(data)
+
+
+def test_detect_market_regime_defaults_to_sideways_for_short_or_missing_data():
+    agent = AdaptiveLearningAgent()
+
+    assert agent._detect_market_regime(_market_data(np.linspace(100, 120, 30))) == 'sideways'
+    assert agent._detect_market_regime(pd.DataFrame({'Open': np.ones(60)})) == 'sideways'
+    assert agent._detect_market_regime([1, 2, 3]) == 'sideways'
+
+
+def test_regime_kernels_agree():
+    rng = np.random.default_rng(11)
+
+    for scale in (0.001, 0.01, 0.02, 0.05):
+        for _ in range(20):
+            close = 100 * np.cumprod(1 + rng.normal(0.001, scale, 50))
+            assert _regime_kernel(close) == _regime_kernel_numpy(close)
+
+
+def test_learn_from_error_keeps_bounded_error_history():
+    agent = AdaptiveLearningAgent()
+    errors = []
+    weight = 1.0
+
+    for i in range(130):
+        predicted = 100.0 + (i % 7)
+        agent.learn_from_error('lstm', predicted=predicted, actual=100.0)
+        errors.append(abs(100.0 - predicted) / 100.0)
+        weight = 0.1 * (1.0 / (1.0 + np.mean(errors[-20:]))) + 0.9 * weight
+
+    perf = agent.model_performance['lstm']
+    assert perf['count'] == 100
+    np.testing.assert_allclose(agent._recent_errors(perf, 100), errors[-100:])
+    assert perf['weights'] == pytest.approx(weight)
+
+    report = agent.get_learning_report()['model_performance']['lstm']
+    assert report['predictions_count'] == 100
+    assert report['avg_error'] == pytest.approx(np.mean(errors[-100:]))
+    assert agent.get_learning_report()['model_performance']['transformer']['avg_error'] == 0
+
+
+def test_restore_errors_round_trips_recent_errors():
+    agent = AdaptiveLearningAgent()
+    perf = agent.model_performance['transformer']
+
+    agent._restore_errors(perf, [0.01, 0.02, 0.03])
+    agent.learn_from_error('transformer', predicted=104.0, actual=100.0)
+
+    np.testing.assert_allclose(agent._recent_errors(perf, 20), [0.01, 0.02, 0.03, 0.04])
+
+
+def test_adaptive_weights_are_cached_until_a_weight_changes():
+    agent = AdaptiveLearningAgent()
+
+    weights = agent._calculate_adaptive_weights()
+    cached = agent._cached_adaptive_weights
+    assert weights == {'transformer': 0.5, 'lstm': 0.5}
+    assert agent._calculate_adaptive_weights() == weights
+    assert agent._cached_adaptive_weights is cached
+
+    agent.learn_from_error('lstm', predicted=150.0, actual=100.0)
+    updated = agent._calculate_adaptive_weights()
+
+    assert agent._cached_adaptive_weights is not cached
+    assert updated['transformer'] > updated['lstm']
+    assert sum(updated.values()) == pytest.approx(1.0)
+
+
+def test_adaptive_weights_are_copied_for_callers():
+    agent = AdaptiveLearningAgent()
+    data = _market_data(np.linspace(100, 120, 80))
+
+    agent.predict('TEST', data)['adaptive_weights']['lstm'] = 99.0
+    agent._calculate_adaptive_weights()['transformer'] = 99.0
+
+    assert agent.predict('TEST', data)['adaptive_weights'] == {'transformer': 0.5, 'lstm': 0.5}
+
+
+def test_predict_returns_adaptive_prediction_with_mapping_access():
+    agent = AdaptiveLearningAgent()
+
+    result = agent.predict('TEST', _market_data(np.linspace(100, 120, 80)))
+
+    assert isinstance(result, AdaptivePrediction)
+    assert result.market_regime == 'bull'
+    assert result['confidence_adjustment'] == result.recommended_strategy['confidence_boost']
+    assert result.get('missing', 'default') == 'default'
+    assert result.to_dict()['adaptive_weights'] == {'transformer': 0.5, 'lstm': 0.5}
+    assert agent.get_confidence(result, None) == pytest.approx(0.8)
+    with pytest.raises(KeyError):
+        result['missing']
+
+
+def test_update_strategy_performance_clamps_confidence_boost():
+    agent = AdaptiveLearningAgent()
+
+    for _ in range(30):
+        agent.update_strategy_performance('bull', predicted=100.0, actual=100.0)
+        agent.update_strategy_performance('volatile', predicted=150.0, actual=100.0)
+
+    assert agent.regime_strategies['bull']['confidence_boost'] == 0.2
+    assert agent.regime_strategies['volatile']['confidence_boost'] == -0.2
+    assert type(agent.regime_strategies['bull']['confidence_boost']) is float
+
+
+def test_learning_state_round_trips_through_disk(tmp_path):
+    filepath = tmp_path / 'state' / 'adaptive_learning_state.json'
+    agent = AdaptiveLearningAgent()
+    for predicted in (101.0, 103.0, 98.0):
+        agent.learn_from_error('transformer', predicted=predicted, actual=100.0)
+    agent.update_strategy_performance('bear', predicted=100.0, actual=100.0)
+
+    agent.save_learning_state(str(filepath))
+
+    assert not (tmp_path / 'state' / 'adaptive_learning_state.json.tmp').exists()
+    assert b'\n' not in filepath.read_bytes()
+
+    restored = AdaptiveLearningAgent()
+    assert restored.load_learning_state(str(filepath)) is True
+    np.testing.assert_allclose(
+        restored._recent_errors(restored.model_performance['transformer'], 20),
+        [0.01, 0.03, 0.02],
+    )
+    assert restored.model_performance['transformer']['weights'] == pytest.approx(
+        agent.model_performance['transformer']['weights']
+    )
+    assert restored.regime_strategies['bear']['confidence_boost'] == pytest.approx(0.06)
+
+
+def test_regime_strategies_accept_names_and_codes():
+    agent = AdaptiveLearningAgent()
+
+    agent.update_strategy_performance(Regime.BEAR, predicted=100.0, actual=100.0)
+    agent.update_strategy_performance('bear', predicted=100.0, actual=100.0)
+    agent.update_strategy_performance('unknown', predicted=100.0, actual=100.0)
+
+    assert agent.regime_strategies['bear']['confidence_boost'] == pytest.approx(0.07)
+    assert agent._detect_regime_code(_market_data(np.linspace(120, 100, 80))) is Regime.BEAR
+
+    agent.regime_strategies = {'volatile': {'model_preference': 'lstm', 'confidence_boost': -0.15}}
+    assert agent.regime_strategies['volatile']['model_preference'] == 'lstm'
+    assert agent.regime_strategies['bull']['model_preference'] == 'transformer'
+
+
+def test_regime_strategies_view_is_read_only_and_setter_warns(caplog):
+    agent = AdaptiveLearningAgent()
+
+    with pytest.raises(TypeError):
+        agent.regime_strategies['bull'] = {'model_preference': 'lstm', 'confidence_boost': 0.0}
+
+    with caplog.at_level('WARNING'):
+        agent.regime_strategies = {'crash': {'model_preference': 'lstm', 'confidence_boost': -0.2}}
+
+    assert 'crash' in caplog.text
+    assert 'crash' not in agent.regime_strategies
+    assert agent.get_learning_report()['regime_strategies']['bull']['model_preference'] == 'transformer'
+
+
+def test_streaming_regime_detection_matches_full_recompute():
+    agent = AdaptiveLearningAgent()
+    rng = np.random.default_rng(3)
+    close = 100 * np.cumprod(1 + rng.normal(0.0005, 0.02, 260))
+    data = _market_data(close)
+
+    for end in range(60, len(data) + 1):
+        window = data.iloc[:end]
+        assert agent._detect_regime_code(window, 'TEST') == agent._detect_regime_code(window)
+
+    state = agent._sma_state['TEST']
+    assert state.last_label == data.index[-1]
+    assert 0 < state.steps <= 50
+
+
+def test_regime_state_rebuilds_after_gap_or_revised_close():
+    agent = AdaptiveLearningAgent()
+    data = _market_data(np.linspace(100, 120, 80))
+
+    agent._detect_regime_code(data.iloc[:60], 'TEST')
+    agent._detect_regime_code(data.iloc[:65], 'TEST')
+    assert agent._sma_state['TEST'].steps == 0
+
+    revised = data.iloc[:66].copy()
+    revised.iloc[-2, 0] = 90.0
+    assert agent._detect_regime_code(revised, 'TEST') == agent._detect_regime_code(revised)
+    assert agent._sma_state['TEST'].steps == 0
+
+
+def test_learning_updates_tolerate_zero_actual():
+    agent = AdaptiveLearningAgent()
+
+    agent.learn_from_error('lstm', predicted=1.0, actual=0.0)
+    agent.update_strategy_performance('bull', predicted=1.0, actual=0.0)
+    agent.update_performance(actual=0.0, predicted=0.0)
+
+    assert np.isfinite(agent.model_performance['lstm']['weights'])
+    assert agent.regime_strategies['bull']['confidence_boost'] == pytest.approx(0.09)
+    assert agent.get_accuracy() == 1.0
+
+
+def test_load_learning_state_rejects_unknown_schema_or_invalid_errors(tmp_path):
+    agent = AdaptiveLearningAgent()
+    filepath = tmp_path / 'adaptive_learning_state.json'
+
+    filepath.write_text(json.dumps({'schema_version': 99, 'model_performance': {}}))
+    assert agent.load_learning_state(str(filepath)) is False
+
+    filepath.write_text(json.dumps({
+        'model_performance': {
+            'lstm': {'weights': 0.4, 'recent_errors': [0.01, 0.02]},
+            'transformer': {'weights': 0.9, 'recent_errors': [0.01, -1.0]},
+        },
+    }))
+    assert agent.load_learning_state(str(filepath)) is False
+    assert agent.model_performance['lstm']['weights'] == 1.0
+    assert agent.model_performance['lstm']['count'] == 0
+
+    filepath.write_text(json.dumps({
+        'model_performance': {'lstm': {'weights': 0.4, 'recent_errors': [0.01, 0.02]}},
+    }))
+    assert agent.load_learning_state(str(filepath)) is True
+    assert agent.model_performance['lstm']['count'] == 2
+    assert agent._calculate_adaptive_weights()['lstm'] == pytest.approx(0.4 / 1.4)
+
+
+def test_saved_metadata_created_at_is_iso_formatted(tmp_path):
+    filepath = tmp_path / 'adaptive_learning_state.json'
+    agent = AdaptiveLearningAgent()
+
+    agent.save_learning_state(str(filepath))
+
+    created_at = json.loads(filepath.read_text())['metadata']['created_at']
+    assert datetime.fromisoformat(created_at).timestamp() == pytest.approx(agent.metadata['created_at'])
+
+
+def test_detect_market_regime_accepts_close_arrays():
+    agent = AdaptiveLearningAgent()
+    close = np.linspace(120, 100, 80)
+
+    assert agent._detect_market_regime_np(close) == 'bear'
+    assert agent._detect_regime_code(close) is Regime.BEAR
+    assert agent.predict('TEST', close).market_regime == 'bear'
+    assert agent._detect_market_regime_np(close[:10]) == 'sideways'
+
+
+def test_get_confidence_clamps_adjusted_confidence():
+    agent = AdaptiveLearningAgent()
+
+    assert agent.get_confidence({'confidence_adjustment': 0.5}, None) == 1.0
+    assert agent.get_confidence({'confidence_adjustment': -0.9}, None) == 0.0
+    assert agent.get_confidence({}, None) == pytest.approx(0.7)
+    assert agent.get_confidence(None, None) == pytest.approx(0.7)
@@ -0,0 +1,252 @@
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from app.agents import chat_agent as chat_agent_module
+from app.agents.chat_agent import ChatAgent
+
+
+class StubChatService:
+    def __init__(self, preferences=None, history=None):
+        self.preferences = preferences or {}
+        self.history = history or []
+        self.calls = []
+
+    def get_user_preferences(self, user_id):
+        self.calls.append(('get_user_preferences', user_id))
+        return dict(self.preferences)
+
+    def get_conversation_history(self, user_id, limit=10):
+        self.calls.append(('get_conversation_history', user_id, limit))
+        return list(self.history)
+
+    def update_user_preferences(self, user_id, **kwargs):
+        self.calls.append(('update_user_preferences', user_id, kwargs))
+        return True
+
+    def save_conversation(self, user_id, message, response, context=None, sentiment=None):
+        self.calls.append(('save_conversation', user_id, message, response))
+        return 1
+
+
+@pytest.fixture
+def chat_service(monkeypatch):
+    stub = StubChatService(preferences={'topics_of_interest': ['predict']}, history=[{'user_message': 'hi'}])
+    for name in ('get_user_preferences', 'get_conversation_history', 'update_user_preferences', 'save_conversation'):
+        monkeypatch.setattr(chat_agent_module.ChatService, name, getattr(stub, name))
+    return stub
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = ChatAgent()
+    monkeypatch.setattr(agent, '_build_ollama_context', lambda user_id, preferences, context: {})
+    return agent
+
+
+def _llm_reply(response, intent='general', action=None, entities=None):
+    return lambda message, context=None, conversation_history=None: {
+        'response': response,
+        'intent': intent,
+        'action': action,
+        'entities': entities or {},
+        'success': True,
+    }
+
+
+def test_chat_returns_llm_response(agent, chat_service, monkeypatch):
+    monkeypatch.setattr(agent.ollama_service, 'process_user_message', _llm_reply('Happy to help!'))
+
+    result = agent.chat(7, 'hello there')
+
+    assert result == {'message': 'Happy to help!', 'intent': 'general', 'context': {}}
+    assert ('get_conversation_history', 7, 5) in chat_service.calls
+    assert [call[0] for call in chat_service.calls].count('get_user_preferences') == 1
+
+
+def test_chat_reports_llm_failure(agent, chat_service, monkeypatch):
+    monkeypatch.setattr(
+        agent.ollama_service, 'process_user_message',
+        lambda message, context=None, conversation_history=None: {'response': 'LLM down', 'success': False},
+    )
+
+    result = agent.chat(7, 'hello there')
+
+    assert result == {'message': 'LLM down', 'intent': 'error', 'context': {}}
+
+
+def test_chat_writes_learned_preferences_once(agent, chat_service, monkeypatch):
+    chat_service.preferences['preferred_stocks'] = ['TCS']
+    monkeypatch.setattr(
+        agent.ollama_service, 'process_user_message',
+        _llm_reply('Here you go.', intent='show_values', action='display_stock_values',
+                   entities={'symbols': ['INFY', 'TCS']}),
+    )
+
+    agent.chat(7, 'show INFY and TCS')
+
+    writes = [call for call in chat_service.calls if call[0] == 'update_user_preferences']
+    assert len(writes) == 1
+    assert writes[0][2] == {
+        'interaction_style': 'concise',
+        'topics_of_interest': ['predict', 'show_values'],
+        'preferred_stocks': ['TCS', 'INFY'],
+    }
+
+
+@pytest.fixture
+def quotes_db(monkeypatch):
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript('''
+        CREATE TABLE stock_quotes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, security_id TEXT UNIQUE, company_name TEXT,
+            current_value REAL, change REAL, p_change REAL, day_high REAL, day_low REAL,
+            high_52week REAL, low_52week REAL, updated_on TEXT
+        );
+        INSERT INTO stock_quotes (security_id, company_name, current_value, change, p_change, day_high, day_low,
+                                  high_52week, low_52week, updated_on)
+        VALUES ('TCS', 'Tata Consultancy Services', 3500.0, 10.0, 0.29, 3520.0, 3480.0, 4200.0, 3100.0, '2026-03-24');
+    ''')
+    opened = []
+
+    class _SessionManager:
+        @contextmanager
+        def get_session(self):
+            opened.append(1)
+            yield conn
+
+    monkeypatch.setattr(chat_agent_module, 'get_session_manager', _SessionManager)
+    chat_agent_module._QUOTE_CACHE.clear()
+    yield opened
+    chat_agent_module._QUOTE_CACHE.clear()
+    conn.close()
+
+
+def test_get_price_caches_quote_lookups(agent, quotes_db):
+    first = agent._handle_get_price(7, {'symbols': ['TCS', 'NOPE']}, 'Prices:')
+    second = agent._handle_get_price(7, {'symbols': ['TCS', 'NOPE']}, 'Prices:')
+
+    assert first == second
+    assert first['context']['prices'] == [{
+        'symbol': 'TCS', 'company': 'Tata Consultancy Services', 'price': 3500.0,
+        'change': 10.0, 'pchange': 0.29, 'high': 3520.0, 'low': 3480.0,
+    }]
+    assert len(quotes_db) == 1  # both symbols resolved in one session, misses cached too
+    assert chat_agent_module._get_quote('TCS')['security_id'] == 'TCS'
+    assert len(quotes_db) == 1
+
+
+def test_chat_skips_preference_write_when_nothing_changed(agent, chat_service, monkeypatch):
+    chat_service.preferences.update({
+        'interaction_style': 'concise',
+        'topics_of_interest': ['predict', 'show_values'],
+        'preferred_stocks': ['TCS', 'INFY'],
+    })
+    monkeypatch.setattr(
+        agent.ollama_service, 'process_user_message',
+        _llm_reply('Here you go.', intent='show_values', action='display_stock_values', entities={'symbols': ['INFY']}),
+    )
+
+    agent.chat(7, 'show INFY')
+
+    assert not [call for call in chat_service.calls if call[0] == 'update_user_preferences']
+
+
+def test_chat_saves_conversation_in_background(agent, chat_service, monkeypatch):
+    saved = threading.Event()
+    monkeypatch.setattr(chat_agent_module.ChatService, 'save_conversation', lambda **kwargs: saved.set())
+    monkeypatch.setattr(agent.ollama_service, 'process_user_message', _llm_reply('Happy to help!'))
+
+    assert agent.chat(7, 'hello there')['message'] == 'Happy to help!'
+    assert saved.wait(timeout=5)
+
+
+def test_background_writes_do_not_hold_up_reply_reads(agent, chat_service, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(chat_agent_module.ChatService, 'save_conversation', lambda **kwargs: release.wait(timeout=5))
+    monkeypatch.setattr(agent.ollama_service, 'process_user_message', _llm_reply('Happy to help!'))
+
+    started = time.monotonic()
+    try:
+        # More stalled writes than the read pool has workers: replies must not wait for them
+        for _ in range(chat_agent_module._IO_POOL._max_workers + 1):
+            assert agent.chat(7, 'hello there')['message'] == 'Happy to help!'
+        assert time.monotonic() - started < 2
+    finally:
+        release.set()
+
+
+def test_add_watchlist_resolves_symbols_in_one_query(agent, quotes_db, monkeypatch):
+    added = []
+    monkeypatch.setattr(
+        chat_agent_module.WatchlistDBService, 'add',
+        lambda user_id, symbol, company_name: added.append((user_id, symbol, company_name)) or True,
+    )
+
+    result = agent._handle_add_watchlist(7, {'symbols': ['TCS', 'NOPE']}, 'Sure.')
+
+    assert result['context'] == {'action': 'add', 'symbols': ['TCS']}
+    assert added == [(7, 'TCS', 'Tata Consultancy Services')]
+    assert len(quotes_db) == 1
+
+
+def test_prediction_looks_up_symbol_directly(agent, monkeypatch):
+    from app.db.data_models import Prediction
+    from app.db.services.prediction_service import PredictionService
+
+    lookups = []
+
+    def _get_by_symbol(symbol, limit=1):
+        lookups.append(symbol)
+        return [Prediction(company_name='Tata Consultancy Services', security_id='TCS', current_price=100.0,
+                           predicted_price=110.0, prediction_date='2026-03-24', stock_symbol='TCS')]
+
+    monkeypatch.setattr(PredictionService, 'get_by_symbol', staticmethod(_get_by_symbol))
+    monkeypatch.setattr(PredictionService, 'get_all', staticmethod(lambda *a, **k: pytest.fail('full scan')))
+
+    result = agent._handle_prediction(7, 'predict tcs', {}, [], {'symbols': ['TCS']})
+
+    assert lookups == ['TCS']
+    assert result['context'] == {'symbol': 'TCS', 'predicted_price': 110.0}
+
+
+def test_canned_replies_rotate_round_robin(agent):
+    greetings = [agent._handle_greeting(7, 'hi', {}, [], {})['message'] for _ in range(4)]
+
+    assert greetings == [*ChatAgent._GREETINGS, ChatAgent._GREETINGS[0]]
+
+
+def test_watchlist_reads_are_shared_until_chat_adds(agent, quotes_db, monkeypatch):
+    from app.db.data_models import Watchlist
+
+    reads = []
+
+    def _get_by_user(user_id):
+        reads.append(user_id)
+        return [Watchlist(user_id=user_id, stock_symbol='INFY', company_name='Infosys')]
+
+    monkeypatch.setattr(chat_agent_module.WatchlistDBService, 'get_by_user', _get_by_user)
+    monkeypatch.setattr(chat_agent_module.WatchlistDBService, 'add', lambda user_id, symbol, company_name: True)
+    chat_agent_module._WATCHLIST_CACHE.clear()
+
+    agent._handle_view_watchlist(7, {}, 'Here it is.')
+    agent._handle_view_watchlist(7, {}, 'Here it is.')
+    assert reads == [7]
+
+    agent._handle_add_watchlist(7, {'symbols': ['TCS']}, 'Sure.')
+    agent._handle_view_watchlist(7, {}, 'Here it is.')
+    assert reads == [7, 7]
+    chat_agent_module._WATCHLIST_CACHE.clear()
+
+
+def test_importing_chat_agent_does_not_load_pandas():
+    # A fresh interpreter, since the test session has already imported pandas
+    code = "import sys, app.agents.chat_agent; sys.exit('pandas' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).resolve().parents[2]).returncode == 0
@@ -0,0 +1,257 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from cachetools import TTLCache
+
+from app.agents.data_enrichment_agent import (
+    DataEnrichmentAgent,
+    _MARKET_REGIMES,
+    _volatility_kernel,
+    _volatility_kernel_pandas,
+)
+from app.features.feature_factory import create_features
+
+
+def _ohlcv(n=300, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.0005, 0.015, n))
+    spread = close * rng.uniform(0.002, 0.02, n)
+    index = pd.date_range(end='2026-03-24', periods=n, freq='B')
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.5, n),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000, 100_000, n).astype(float),
+    }, index=index)
+
+
+def test_momentum_features_match_pandas_reference():
+    agent = DataEnrichmentAgent()
+    df = _ohlcv()
+
+    result = agent._add_momentum_features(df)
+
+    for period in (5, 10, 20, 50):
+        pd.testing.assert_series_equal(
+            result[f'Momentum_{period}'], df['Close'] - df['Close'].shift(period), check_names=False
+        )
+        pd.testing.assert_series_equal(
+            result[f'Momentum_Pct_{period}'], df['Close'].pct_change(periods=period), check_names=False
+        )
+    assert 'Momentum_5' not in df.columns
+    assert agent._add_momentum_features(df.head(3))['Momentum_50'].isna().all()
+
+
+def test_volatility_features_match_rolling_reference():
+    agent = DataEnrichmentAgent()
+    df = _ohlcv()
+    df['Returns'] = df['Close'].pct_change()
+
+    result = agent._add_volatility_clustering_features(df)
+
+    for window in (10, 20, 50):
+        pd.testing.assert_series_equal(
+            result[f'Volatility_{window}'], df['Returns'].rolling(window=window).std(),
+            check_names=False, rtol=1e-9,
+        )
+    pd.testing.assert_series_equal(
+        result['Volatility_Persistence'], (df['Returns'] ** 2).rolling(window=20).mean(),
+        check_names=False, rtol=1e-9,
+    )
+    assert 'Volatility_10' not in df.columns
+
+
+def test_volatility_kernels_agree_with_gaps():
+    rng = np.random.default_rng(9)
+    returns = rng.normal(0, 0.02, 400)
+    returns[[0, 75, 76, 200]] = np.nan
+    windows = np.array([10, 20, 50], dtype=np.int64)
+
+    stds, persistence = _volatility_kernel(returns, windows, 20)
+    ref_stds, ref_persistence = _volatility_kernel_pandas(returns, windows, 20)
+
+    np.testing.assert_allclose(stds, ref_stds, rtol=1e-9, atol=1e-15)
+    np.testing.assert_allclose(persistence, ref_persistence, rtol=1e-9, atol=1e-15)
+
+
+def _reference_adx(df, period=14):
+    high, low, close = df['High'], df['Low'], df['Close']
+    up_move = high.diff()
+    down_move = -low.diff()
+    plus_dm = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0), index=df.index)
+    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0), index=df.index)
+    tr = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    atr = tr.rolling(window=period).mean()
+    plus_di = 100 * plus_dm.rolling(window=period).mean() / atr
+    minus_di = 100 * minus_dm.rolling(window=period).mean() / atr
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di + 1e-6)
+    return dx.rolling(window=period).mean()
+
+
+def test_adx_matches_pandas_reference_on_dated_index():
+    agent = DataEnrichmentAgent()
+    df = _ohlcv()
+
+    adx = agent._calculate_adx(df)
+
+    pd.testing.assert_series_equal(adx, _reference_adx(df), check_names=False, rtol=1e-9)
+    assert adx.notna().sum() == len(df) - 26
+    assert agent._calculate_adx(df.head(5)).isna().all()
+
+
+def test_market_regime_features_are_int8_codes():
+    agent = DataEnrichmentAgent()
+    df = _ohlcv()
+    df['SMA_20'] = df['Close'].rolling(20).mean()
+    df['SMA_50'] = df['Close'].rolling(50).mean()
+
+    result = agent._add_market_regime_features(df)
+
+    assert result['Market_Regime'].dtype == np.int8
+    assert result['Bull_Market'].dtype == np.int8
+    np.testing.assert_array_equal(result['Market_Regime'], (result['ADX'] > 25).astype(np.int8))
+    assert {_MARKET_REGIMES[code] for code in result['Market_Regime']} == {'ranging', 'trending'}
+
+
+def test_support_resistance_and_fib_levels_match_rolling_reference():
+    agent = DataEnrichmentAgent()
+    df = _ohlcv()
+
+    result = agent._add_advanced_technical_features(df)
+
+    high_50 = df['High'].rolling(50).max()
+    low_50 = df['Low'].rolling(50).min()
+    pd.testing.assert_series_equal(result['Fib_618'], high_50 - 0.618 * (high_50 - low_50), check_names=False)
+    pd.testing.assert_series_equal(result['Support_Level'], df['Low'].rolling(20).min(), check_names=False)
+    pd.testing.assert_series_equal(result['Resistance_Level'], df['High'].rolling(20).max(), check_names=False)
+    pd.testing.assert_series_equal(
+        result['Distance_to_Support'], (df['Close'] - df['Low'].rolling(20).min()) / df['Close'], check_names=False
+    )
+    assert 'Fib_382' not in df.columns
+
+
+def test_enrich_data_attaches_every_feature_group_once(monkeypatch):
+    agent = DataEnrichmentAgent()
+    df = _ohlcv(n=400)
+    monkeypatch.setattr(agent, 'log_decision', lambda *args, **kwargs: None)
+
+    enriched = agent.enrich_data('TEST', df)
+
+    base = create_features(df, volatility_type='medium')
+    chained = agent._add_momentum_features(agent._add_volatility_clustering_features(
+        agent._add_market_regime_features(agent._add_advanced_technical_features(base))
+    ))
+    added = chained.columns.difference(base.columns)
+    assert (enriched[added].dtypes[chained[added].dtypes == np.float64] == np.float32).all()
+    assert (enriched[base.columns].dtypes == base.dtypes).all()
+    pd.testing.assert_frame_equal(enriched, chained, check_dtype=False, rtol=1e-5)
+    pd.testing.assert_series_equal(
+        chained['Stochastic_D'],
+        (100 * (base['Close'] - base['Low'].rolling(14).min())
+         / (base['High'].rolling(14).max() - base['Low'].rolling(14).min() + 1e-6)).rolling(3).mean(),
+        check_names=False, rtol=1e-9,
+    )
+
+
+def test_enrich_data_reuses_result_until_bars_change(monkeypatch):
+    agent = DataEnrichmentAgent()
+    df = _ohlcv(n=400)
+    monkeypatch.setattr(agent, 'log_decision', lambda *args, **kwargs: None)
+
+    first = agent.enrich_data('TEST', df)
+    first['Extra'] = 1.0
+    second = agent.enrich_data('TEST', df.copy())
+
+    assert 'Extra' not in second.columns
+    pd.testing.assert_frame_equal(second, first.drop(columns='Extra'))
+    assert len(agent._enriched_cache) == 1
+
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] *= 1.01
+    assert agent.enrich_data('TEST', revised)['Close'].iloc[-1] == revised['Close'].iloc[-1]
+    assert len(agent._enriched_cache) == 2
+
+
+def test_load_stock_data_expires_after_ttl(monkeypatch):
+    from app.agents import data_enrichment_agent as module
+
+    clock = [1000.0]
+    downloads = []
+    cache = TTLCache(maxsize=module._STOCK_DATA_CACHE_SIZE, ttl=module._STOCK_DATA_TTL, timer=lambda: clock[0])
+    monkeypatch.setattr(module, '_STOCK_DATA_CACHE', cache)
+    monkeypatch.setattr('yfinance.download', lambda symbol, **kwargs: downloads.append(symbol) or _ohlcv(n=10))
+    agent = DataEnrichmentAgent()
+
+    first = agent._load_stock_data('TCS.NS')
+    clock[0] += module._STOCK_DATA_TTL - 1
+    assert DataEnrichmentAgent()._load_stock_data('TCS.NS') is first
+    clock[0] += 2
+    assert agent._load_stock_data('TCS.NS') is not first
+    assert downloads == ['TCS.NS', 'TCS.NS']
+
+    for i in range(module._STOCK_DATA_CACHE_SIZE):
+        agent._load_stock_data(f'S{i}')
+    assert len(agent.cache) == module._STOCK_DATA_CACHE_SIZE
+    assert 'TCS.NS_data' not in agent.cache
+
+
+def test_concurrent_loads_share_one_download(monkeypatch):
+    from app.agents import data_enrichment_agent as module
+
+    monkeypatch.setattr(module, '_STOCK_DATA_CACHE', TTLCache(maxsize=8, ttl=60))
+    started = threading.Event()
+    release = threading.Event()
+    downloads = []
+
+    def _slow_download(symbol, **kwargs):
+        downloads.append(symbol)
+        started.set()
+        release.wait(timeout=5)
+        return _ohlcv(n=10)
+
+    monkeypatch.setattr('yfinance.download', _slow_download)
+    agent = DataEnrichmentAgent()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(agent._load_stock_data('INFY.NS'))) for _ in range(3)]
+
+    threads[0].start()
+    assert started.wait(timeout=5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert downloads == ['INFY.NS']
+    assert len(results) == 3 and all(result is results[0] for result in results)
+
+
+def test_data_quality_counts_missing_values_across_dtypes():
+    agent = DataEnrichmentAgent()
+    df = _ohlcv(n=100)
+    df.iloc[:10, 0] = np.nan
+    df['Label'] = ['x'] * 95 + [None] * 5
+    df['Flag'] = np.int8(1)
+
+    expected_missing = df.isnull().sum().sum() / (df.shape[0] * df.shape[1])
+    days_old = (pd.Timestamp.now() - df.index.max()).days
+    expected = np.mean([1.0 - expected_missing, max(0, 1.0 - days_old / 30), 0.1])
+
+    assert agent._assess_data_quality(df) == pytest.approx(expected)
+
+
+def test_download_locks_stay_bounded(monkeypatch):
+    from app.agents import data_enrichment_agent as module
+
+    monkeypatch.setattr(module, '_STOCK_DATA_CACHE', TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr('yfinance.download', lambda symbol, **kwargs: _ohlcv(n=10))
+    agent = DataEnrichmentAgent()
+
+    for i in range(100):
+        agent._load_stock_data(f'S{i}')
+
+    assert len(module._DOWNLOAD_LOCKS) == module._DOWNLOAD_LOCK_STRIPES
+    assert not any(lock.locked() for lock in module._DOWNLOAD_LOCKS)
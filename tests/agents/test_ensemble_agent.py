@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents import ensemble_agent as ensemble_agent_module
+from app.agents.ensemble_agent import EnsembleAgent
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = EnsembleAgent()
+    monkeypatch.setattr(agent, 'log_decision', lambda *args, **kwargs: None)
+    return agent
+
+
+def _history(periods=200):
+    index = pd.date_range(end='2026-03-24', periods=periods, freq='B')
+    return pd.DataFrame({'Close': np.linspace(100, 120, periods), 'Volume': 1000.0, 'RSI': 55.0}, index=index)
+
+
+def test_predict_builds_history_once_and_runs_analyses_concurrently(agent, monkeypatch):
+    from app.models import ollama_model
+
+    barrier = threading.Barrier(len(agent.analysis_types), timeout=5)
+    fetches = []
+
+    def _call_ollama(prompt):
+        barrier.wait()  # only passes if every analysis is in flight at once
+        return {'response': '{"predicted_price": 110.0, "confidence": 0.8, "decision": "accept"}'}
+
+    monkeypatch.setattr(ollama_model, '_fetch_stock_history',
+                        lambda symbol, period_months=1: fetches.append(symbol) or _history(60))
+    monkeypatch.setattr(ollama_model, '_call_ollama_with_retry', _call_ollama)
+
+    result = agent.predict('TCS')
+
+    assert fetches == ['TCS']
+    assert result['prediction'] == pytest.approx(110.0)
+    assert [detail['model_type'] for detail in result['model_details']] == ['ollama_technical', 'ollama_fundamental']
+
+
+def test_predict_skips_failed_analysis(agent, monkeypatch):
+    monkeypatch.setattr(ensemble_agent_module, 'predict_many_with_details', lambda symbol, analysis_types, hist=None: {
+        'fundamental': {'predicted_price': 120.0, 'confidence': 0.7},
+    })
+
+    result = agent.predict('TCS')
+
+    assert result['num_models'] == 1
+    assert result['prediction'] == pytest.approx(120.0)
+
+    monkeypatch.setattr(ensemble_agent_module, 'predict_many_with_details', lambda symbol, analysis_types, hist=None: {})
+    with pytest.raises(ValueError):
+        agent.predict('TCS')
+
+
+def test_predict_reuses_callers_price_history(agent, monkeypatch):
+    from app.models import ollama_model
+
+    enriched = _history()
+    index = enriched.index
+    prompts = []
+    monkeypatch.setattr(ollama_model, '_fetch_stock_history', lambda *args, **kwargs: pytest.fail('refetched'))
+    monkeypatch.setattr(ollama_model, '_call_ollama_with_retry', lambda prompt: prompts.append(prompt) or {
+        'response': '{"predicted_price": 121.0, "confidence": 0.8, "decision": "accept"}'
+    })
+
+    result = agent.predict('TCS', enriched)
+
+    assert result['prediction'] == pytest.approx(121.0)
+    assert len(prompts) == 2 and prompts[0] == prompts[1] and 'Current Price: 120.00' in prompts[0]
+    recent = ollama_model._recent_history(enriched, period_months=3)
+    assert recent.index[0] > index[-1] - pd.DateOffset(months=3) >= recent.index[0] - pd.offsets.BDay()
+
+
+@pytest.mark.parametrize('predictions, confidences', [
+    ([101.0, 99.5], [0.8, 0.6]),
+    ([101.0, 99.5, 104.25, 98.0], [0.8, 0.0, 0.55, 0.7]),
+    ([120.0], [0.0]),
+])
+def test_scalar_combination_matches_numpy(agent, predictions, confidences):
+    expected = {
+        'average': np.mean(predictions),
+        'weighted_average': (np.sum(np.array(predictions) * np.array(confidences)) / np.sum(confidences)
+                             if np.sum(confidences) else np.mean(predictions)),
+        'voting': np.median(predictions),
+    }
+    for method, value in expected.items():
+        agent.ensemble_method = method
+        assert agent._combine_predictions(predictions, confidences) == pytest.approx(value)
+
+    mean, std = np.mean(predictions), np.std(predictions)
+    conf_mean = np.mean(confidences)
+    assert agent._calculate_ensemble_confidence(confidences) == pytest.approx(
+        conf_mean * max(0.5, 1.0 - np.std(confidences) / (conf_mean + 1e-6))
+    )
+    assert agent._calculate_prediction_interval(predictions) == pytest.approx((mean - 1.96 * std, mean + 1.96 * std))
@@ -1,6 +1,7 @@
 from datetime import datetime
 
 import pandas as pd
+import pytest
 
 from app.agents.outcome_evaluator_agent import OutcomeEvaluatorAgent
 from app.agents.prediction_coordinator import PredictionCoordinator
@@ -117,3 +118,114 @@ def test_prediction_coordinator_returns_evaluation_and_tracks_outcomes():
     assert report['metrics']['average_evaluation_score'] > 0
     assert report['metrics']['average_outcome_score'] > 0
 
+
+
+def test_prediction_coordinator_reuses_recent_results_until_invalidated():
+    data_agent = StubDataAgent()
+    calls = []
+    original_predict = data_agent.predict
+    data_agent.predict = lambda symbol, data=None: calls.append(symbol) or original_predict(symbol, data)
+    coordinator = PredictionCoordinator(
+        data_agent=data_agent,
+        ensemble_agent=StubEnsembleAgent(),
+        adaptive_agent=StubAdaptiveAgent(),
+        prediction_evaluator=PredictionEvaluatorAgent(),
+        outcome_evaluator=OutcomeEvaluatorAgent(),
+    )
+
+    first = coordinator.predict('TEST')
+    first['decision'] = 'tampered'
+    first['adaptive_weights']['extra'] = 1.0
+    first['evaluation']['signals'].append('tampered')
+    second = coordinator.predict('TEST')
+    second['model_details'].clear()
+    third = coordinator.predict('TEST')
+
+    assert calls == ['TEST']
+    assert second['decision'] != 'tampered'
+    assert 'extra' not in second['adaptive_weights']
+    assert 'tampered' not in second['evaluation']['signals']
+    assert len(third['model_details']) == 2
+    assert len(coordinator.decision_history) == 1
+
+    coordinator.predict('TEST', validate=False)
+    coordinator.update_with_actual('TEST', predicted=second['prediction'], actual=224.0)
+    coordinator.predict('TEST')
+    assert calls == ['TEST', 'TEST', 'TEST']
+
+    coordinator.set_confidence_threshold(0.7)
+    coordinator.predict('TEST')
+    assert calls == ['TEST', 'TEST', 'TEST', 'TEST']
+
+
+def test_performance_metrics_derive_averages_from_running_sums():
+    from app.agents.prediction_coordinator import PerformanceMetrics
+
+    metrics = PerformanceMetrics()
+    assert metrics.to_dict()['average_confidence'] == 0.0
+
+    confidences = [0.9, 0.55, 0.7]
+    average = 0.0
+    for n, confidence in enumerate(confidences, start=1):
+        metrics.total_predictions += 1
+        metrics.confidence_sum += confidence
+        average = (average * (n - 1) + confidence) / n
+
+    assert metrics['average_confidence'] == pytest.approx(average)
+
+    coordinator = PredictionCoordinator(
+        data_agent=StubDataAgent(),
+        ensemble_agent=StubEnsembleAgent(),
+        adaptive_agent=StubAdaptiveAgent(),
+        prediction_evaluator=PredictionEvaluatorAgent(),
+        outcome_evaluator=OutcomeEvaluatorAgent(),
+    )
+    coordinator._update_performance({'decision': 'accept', 'confidence': 0.8, 'evaluation': {'score': 0.6}})
+    coordinator._update_performance({'decision': 'accept', 'confidence': 0.8, 'evaluation': {}})
+    assert coordinator.performance_metrics.average_evaluation_score == pytest.approx(0.6)
+    assert metrics.get('total_predictions') == 3
+    with pytest.raises(KeyError):
+        metrics['missing']
+
+
+def test_decision_history_keeps_most_recent_records():
+    from app.agents import prediction_coordinator as coordinator_module
+
+    coordinator = PredictionCoordinator(
+        data_agent=StubDataAgent(),
+        ensemble_agent=StubEnsembleAgent(),
+        adaptive_agent=StubAdaptiveAgent(),
+        prediction_evaluator=PredictionEvaluatorAgent(),
+        outcome_evaluator=OutcomeEvaluatorAgent(),
+    )
+    assert coordinator.get_performance_report()['recent_decisions'] == []
+
+    for i in range(coordinator_module._DECISION_HISTORY_SIZE + 5):
+        coordinator.decision_history.append({'symbol': f'S{i}'})
+
+    assert len(coordinator.decision_history) == coordinator_module._DECISION_HISTORY_SIZE
+    assert coordinator.decision_history[0]['symbol'] == 'S5'
+    recent = coordinator.get_performance_report()['recent_decisions']
+    assert [record['symbol'] for record in recent] == [f'S{i}' for i in range(995, 1005)]
+
+
+@pytest.mark.parametrize('confidence, data_quality, uncertainty', [
+    (0.82, 0.9, 1.2),
+    (0.0, 0.0, 0.0),
+    (1.0, 1.0, 0.0),
+    (0.4, 0.7, 25.0),
+])
+def test_trust_score_weights_inputs(confidence, data_quality, uncertainty):
+    coordinator = PredictionCoordinator(
+        data_agent=StubDataAgent(),
+        ensemble_agent=StubEnsembleAgent(),
+        adaptive_agent=StubAdaptiveAgent(),
+        prediction_evaluator=PredictionEvaluatorAgent(),
+        outcome_evaluator=OutcomeEvaluatorAgent(),
+    )
+
+    expected = confidence * 0.5 + data_quality * 0.3 + (1.0 / (1.0 + uncertainty)) * 0.2
+
+    assert coordinator._calculate_trust_score(confidence, data_quality, uncertainty) == pytest.approx(
+        min(1.0, max(0.0, expected))
+    )
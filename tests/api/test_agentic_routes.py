@@ -1,3 +1,6 @@
+import threading
+import time
+
 from flask import Flask
 
 from app.api import agentic_routes
@@ -99,3 +102,24 @@ def test_agentic_health_route_exposes_evaluator_metrics(monkeypatch):
     assert payload['metrics']['average_evaluation_score'] == 0.7
     assert payload['metrics']['blocked_predictions'] == 1
 
+
+
+def test_get_coordinator_builds_one_instance_under_concurrency(monkeypatch):
+    built = []
+
+    def _slow_coordinator(min_confidence):
+        built.append(min_confidence)
+        time.sleep(0.05)
+        return StubCoordinator()
+
+    monkeypatch.setattr(agentic_routes, '_coordinator', None)
+    monkeypatch.setattr(agentic_routes, 'PredictionCoordinator', _slow_coordinator)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(agentic_routes.get_coordinator())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert built == [0.6]
+    assert len(results) == 4 and all(result is results[0] for result in results)
@@ -0,0 +1,88 @@
+"""
+Tests for intent and entity extraction in the Ollama chat service.
+"""
+import pytest
+
+from app.services.ollama_chat_service import OllamaChatService, _trie_pattern
+
+
+@pytest.fixture
+def service():
+    return OllamaChatService()
+
+
+@pytest.mark.parametrize('response, intent, action', [
+    ('The current price of RELIANCE is shown below.', 'check_price', 'get_stock_price'),
+    ('I will forecast TCS for the next week.', 'predict', 'run_prediction'),
+    ('Adding INFY to your watchlist now.', 'watchlist', 'add_watchlist'),
+    ('I can remove it from your watchlist.', 'watchlist', 'remove_watchlist'),
+    ('Here is your watchlist.', 'watchlist', 'view_watchlist'),
+    ('Let me display that for you.', 'show_values', 'display_stock_values'),
+    ('These are the NSE stocks I know about.', 'list_stocks', 'list_available_stocks'),
+    ('Happy to help with anything else!', 'general', None),
+])
+def test_parse_response_detects_intent(service, response, intent, action):
+    assert service._parse_response(response, '')[:2] == (intent, action)
+
+
+def test_parse_response_prefers_higher_priority_intent(service):
+    # 'current value' is a show_values keyword but also contains the check_price keyword 'value'
+    assert service._parse_response('Here is the current value.', '')[0] == 'check_price'
+
+
+def test_parse_response_sets_prediction_scope(service):
+    _, _, entities = service._parse_response('I will predict every stock in your watchlist.', '')
+    assert entities['prediction_scope'] == 'watchlist'
+
+    _, _, entities = service._parse_response('I will predict the stock for you.', '')
+    assert entities['prediction_scope'] == 'single'
+
+    _, _, entities = service._parse_response('Actually, I can predict that stock.', '')
+    assert entities['prediction_scope'] == 'single'
+
+
+def test_parse_response_matches_watchlist_actions_on_whole_words(service):
+    assert service._parse_response('I have added TCS to your watchlist.', '')[1] == 'add_watchlist'
+    assert service._parse_response('TCS was deleted from your watchlist.', '')[1] == 'remove_watchlist'
+    assert service._parse_response('Your watchlist address book is below.', '')[1] == 'view_watchlist'
+
+
+def test_parse_response_extracts_symbols_from_response_and_message(service):
+    _, _, entities = service._parse_response('Checking TCS now.', 'price of RELIANCE and TCS?')
+    assert sorted(entities['symbols']) == ['RELIANCE', 'TCS']
+
+    _, _, entities = service._parse_response('nothing here', 'hello')
+    assert 'symbols' not in entities
+
+
+def test_parse_response_keyword_scan_matches_per_rule_search(service):
+    words = ['show', 'value', 'the', 'predicted', 'watchlist', 'nse', 'stocks', 'list', 'current', 'price', 'run',
+             'prediction', 'securities', 'follow', 'quote', 'display', 'available', 'track']
+    for i in range(len(words)):
+        for j in range(len(words)):
+            response = f'{words[i]} {words[j]} {words[(i + j) % len(words)]}'
+            expected = 'general'
+            for rule_intent, _, keywords in service.INTENT_RULES:
+                if any(word in response for word in keywords):
+                    expected = rule_intent
+                    break
+            assert service._parse_response(response, '')[0] == expected, response
+
+
+def test_trie_pattern_factors_shared_prefixes():
+    assert _trie_pattern(['current price', 'current value']) == r'current\ (?:price|value)'
+    assert _trie_pattern(['watch', 'watchlist']) == 'watch(?:list)?'
+    assert _trie_pattern(['a', 'ab', 'abc']) == 'a(?:bc?)?'
+
+
+@pytest.mark.parametrize('response', [
+    'Here is the Stock-Price chart.',
+    'Check the current. Price later.',
+])
+def test_parse_response_keywords_do_not_match_across_punctuation(service, response):
+    assert service._parse_response(response, '')[0] == 'general'
+
+
+def test_parse_response_action_cues_ignore_trailing_punctuation(service):
+    assert service._parse_response('Your watchlist: TCS was deleted.', '')[1] == 'remove_watchlist'
+    assert service._parse_response('Watchlist updated (added!)', '')[1] == 'add_watchlist'